@@ -23,6 +23,8 @@ from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.newstrack import newstrack_bp
 from src.services.batch_service import init_batch_service
+from src.utils.error_handler import init_queue_logging
+from src.utils.llm_client import prewarm_connections
 
 # Create Flask app with proper static folder configuration
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'src', 'static'))
@@ -36,6 +38,9 @@ app.config['MODEL_NAME'] = os.getenv('MODEL_NAME', 'gemini-1.5-flash')
 app.config['LLM_PROVIDER'] = os.getenv('LLM_PROVIDER', 'google')
 app.config['SEARCH_MODE'] = os.getenv('SEARCH_MODE', 'off')
 
+# Deliver app log records from a background thread
+init_queue_logging(app)
+
 # Register blueprints
 app.register_blueprint(user_bp, url_prefix='/api')
 app.register_blueprint(newstrack_bp, url_prefix='/api')
@@ -49,6 +54,9 @@ with app.app_context():
     # Initialize batch service with Flask app context
     init_batch_service(app)
 
+# Open provider connections in the background so the first request skips the TLS handshake
+prewarm_connections(app)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
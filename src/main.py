@@ -10,8 +10,9 @@ from flask_cors import CORS
 from src.models.user import db
 from src.routes.user import user_bp
 from src.routes.newstrack import newstrack_bp
-from src.utils.error_handler import register_error_handlers
+from src.utils.error_handler import register_error_handlers, init_queue_logging
 from src.services.batch_service import init_batch_service
+from src.utils.llm_client import prewarm_connections
 
 # Create Flask app with proper static folder configuration
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
@@ -28,6 +29,9 @@ app.config['SEARCH_MODE'] = os.getenv('SEARCH_MODE', 'off')
 # Register error handlers
 register_error_handlers(app)
 
+# Deliver app log records from a background thread
+init_queue_logging(app)
+
 # Add request ID and timestamp middleware
 @app.before_request
 def before_request():
@@ -64,6 +68,9 @@ with app.app_context():
     # Initialize batch service with Flask app context
     init_batch_service(app)
 
+# Open provider connections in the background so the first request skips the TLS handshake
+prewarm_connections(app)
+
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
 def serve(path):
@@ -13,6 +13,7 @@ from src.services.newstrack_service import do_categorize, do_expand, do_drop
 from src.utils.audit import get_audit_logger
 from src.utils.guardrails import enforce_isolation, load_guards, get_guardrails_engine
 from src.utils.excel_ingest import extract_keywords_from_excel
+from src.utils.region import region_cache_stats
 from src.utils.csv_ingest import extract_keywords_from_csv, create_batches, validate_csv_format
 from src.services.batch_service import get_batch_service
 from src.utils.config import (
@@ -735,11 +736,12 @@ def get_status():
 def get_debug_config():
     """
     Debug endpoint to show current runtime configuration.
-    Returns the same runtime_config block without secrets.
+    Returns the same runtime_config block without secrets, plus region lookup cache stats.
     """
     try:
         return jsonify({
-            "runtime_config": get_runtime_config()
+            "runtime_config": get_runtime_config(),
+            "region_cache": region_cache_stats()
         })
         
     except Exception as e:
@@ -118,7 +118,8 @@ class BatchService:
                 return False  # Already processing
             batch_group.status = "processing"
         
-        # Submit batches for processing with concurrency control
+        # Submit all batches up front; the executor's worker count bounds how
+        # many run concurrently, so network-bound batches overlap their I/O
         futures = []
         for batch in batch_group.batches:
             future = self.executor.submit(
@@ -129,11 +130,6 @@ class BatchService:
                 processing_config
             )
             futures.append(future)
-            
-            # Limit concurrent processing
-            if len(futures) >= self.max_concurrent_batches:
-                # Wait for at least one to complete
-                as_completed(futures, timeout=1)
         
         # Start monitoring thread
         monitor_thread = threading.Thread(
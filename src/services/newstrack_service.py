@@ -206,6 +206,11 @@ def do_drop(sector: str, company: Optional[str], current_date: str, categories:
     for category_keywords in categories.values():
         all_keywords.extend(category_keywords)
     
+    from src.utils.search_client import _build_region_aware_query, search_for_evidence_many
+    
+    # Evidence searches are collected per keyword and run concurrently after the loop
+    pending_searches = []
+    
     # Process each keyword individually to track debug queries and region scope
     for keyword in all_keywords:
         # Resolve effective source_location for this keyword
@@ -277,25 +282,27 @@ def do_drop(sector: str, company: Optional[str], current_date: str, categories:
                 effective_region_country = country
         
         # Build debug query according to specification: BASE = "{sector} {keyword}"
-        from src.utils.search_client import _build_region_aware_query
         debug_query = _build_region_aware_query(keyword, sector, effective_region_mode, effective_region_country)
         debug_queries[keyword] = debug_query
         
         # Gather evidence if search is enabled
         if search_mode != "off":
-            from src.utils.search_client import search_for_evidence
-            evidence = search_for_evidence(
-                keyword, 
-                recency_months=recency_window_months,
-                max_results=max_results_per_keyword,
-                search_mode=search_mode,
-                sector=sector,
-                source_location=effective_source_location
-            )
-            evidence_refs[keyword] = evidence  # Always store, even if empty
+            pending_searches.append((keyword, {
+                'term': keyword,
+                'recency_months': recency_window_months,
+                'max_results': max_results_per_keyword,
+                'search_mode': search_mode,
+                'sector': sector,
+                'source_location': effective_source_location
+            }))
         else:
             evidence_refs[keyword] = []
     
+    if pending_searches:
+        evidence_lists = search_for_evidence_many([search for _, search in pending_searches])
+        for (keyword, _), evidence in zip(pending_searches, evidence_lists):
+            evidence_refs[keyword] = evidence  # Always store, even if empty
+    
     # Generate flags for all keywords based on evidence and analysis
     flags_map = {}
     
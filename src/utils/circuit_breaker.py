@@ -0,0 +1,141 @@
+"""
+Circuit breaker for upstream provider calls.
+Fails fast while a provider keeps erroring instead of waiting out every timeout.
+"""
+import sys
+import time
+import threading
+from typing import Any, Callable
+from src.utils.error_handler import LLMError
+
+
+class CircuitOpenError(LLMError):
+    """Raised when a call is rejected because the provider's circuit is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"{name} is unavailable after repeated failures; retrying in {retry_in:.0f}s",
+                         provider=name)
+        self.error_code = 'CIRCUIT_OPEN'
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """
+    Whether an error shows the provider itself is unhealthy.
+
+    Only 5xx and 429 responses, timeouts and connection errors count; other 4xx
+    errors come from the request, so a few malformed calls can't open the circuit.
+    """
+    status = getattr(error, 'status_code', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if status is None:
+        status = getattr(error, 'code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, _transport_errors())
+
+
+def _transport_errors() -> tuple:
+    """Timeout/connection error types of the HTTP stacks loaded in this process."""
+    types = [TimeoutError, ConnectionError]
+    # An SDK that was never imported can't have raised, so only loaded ones are checked
+    openai = sys.modules.get('openai')
+    if openai is not None:
+        types.append(openai.APIConnectionError)  # APITimeoutError subclasses it
+    httpx = sys.modules.get('httpx')
+    if httpx is not None:
+        types.append(httpx.TransportError)
+    requests = sys.modules.get('requests')
+    if requests is not None:
+        types.extend((requests.ConnectionError, requests.Timeout))
+    return tuple(types)
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open breaker around one provider.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    fail immediately. Once `recovery_timeout` seconds pass, one probe call is let
+    through; its success closes the circuit, its failure reopens it.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return 'closed'
+            if self._probing or time.monotonic() - self._opened_at >= self.recovery_timeout:
+                return 'half-open'
+            return 'open'
+
+    def before_call(self):
+        """Raise CircuitOpenError unless the call may go ahead."""
+        with self._lock:
+            if self._opened_at is None:
+                return
+            waited = time.monotonic() - self._opened_at
+            if self._probing or waited < self.recovery_timeout:
+                raise CircuitOpenError(self.name, max(0.0, self.recovery_timeout - waited))
+            self._probing = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                self._probing = False
+
+    def release_probe(self):
+        """
+        Give back a probe slot without judging the provider.
+
+        For calls cut short by cancellation or interruption; the circuit stays
+        open, so the next call after the recovery timeout probes again.
+        """
+        with self._lock:
+            self._probing = False
+
+    def call(self, func: Callable[..., Any], *args, is_failure: Callable[[Exception], bool] = None,
+             **kwargs) -> Any:
+        """
+        Run func through the breaker.
+
+        Exceptions count as failures unless is_failure says otherwise; errors it
+        rejects (such as a 400 for a malformed request) show the provider is up
+        and count as success.
+        A cancelled or interrupted call (BaseException) only frees the probe slot.
+        """
+        self.before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            self.record_error(e, is_failure)
+            raise
+        except BaseException:
+            self.release_probe()
+            raise
+        self.record_success()
+        return result
+
+    def record_error(self, error: Exception, is_failure: Callable[[Exception], bool] = None):
+        """Record a failed call, or a success if is_failure rejects the error."""
+        if is_failure is None or is_failure(error):
+            self.record_failure()
+        else:
+            self.record_success()
@@ -4,12 +4,24 @@ Supports UTF-8, Windows-1252, and various CSV formats with robust validation.
 """
 import os
 import io
+import re
 import csv
 import chardet
 import uuid
 import logging
 from typing import List, Dict, Optional, Any, Union, Tuple
 from datetime import datetime
+from src.utils.excel_ingest import CATEGORY_MAP
+
+
+# Common header patterns used to detect a header row
+_HEADER_RE = re.compile(r'keyword|category|source|location|type|term', re.IGNORECASE)
+
+# Cell text (lowercased) treated as an empty value
+_EMPTY_SENTINELS = frozenset({'nan', 'none', '', 'null'})
+
+# Source location text (lowercased) meaning no region restriction
+_GLOBAL_MARKERS = frozenset({'na', 'null', 'none', ''})
 
 
 def load_keywords_from_csv(csv_file: Union[str, io.StringIO, io.BytesIO]) -> List[Dict[str, Optional[str]]]:
@@ -45,12 +57,7 @@ def _load_from_file_path(file_path: str) -> List[Dict[str, Optional[str]]]:
     # Detect encoding
     with open(file_path, 'rb') as f:
         raw_data = f.read()
-        encoding_result = chardet.detect(raw_data)
-        encoding = encoding_result.get('encoding', 'utf-8')
-        
-    # Handle BOM for UTF-8
-    if encoding.lower().startswith('utf-8'):
-        encoding = 'utf-8-sig'
+    encoding = _detect_encoding(raw_data)
     
     try:
         with open(file_path, 'r', encoding=encoding, newline='') as f:
@@ -76,12 +83,7 @@ def _load_from_stream(csv_stream: Union[io.StringIO, io.BytesIO]) -> List[Dict[s
         raw_data = csv_stream.read()
         csv_stream.seek(0)
         
-        encoding_result = chardet.detect(raw_data)
-        encoding = encoding_result.get('encoding', 'utf-8')
-        
-        # Handle BOM
-        if encoding.lower().startswith('utf-8'):
-            encoding = 'utf-8-sig'
+        encoding = _detect_encoding(raw_data)
         
         try:
             text_content = raw_data.decode(encoding)
@@ -103,20 +105,40 @@ def _load_from_stream(csv_stream: Union[io.StringIO, io.BytesIO]) -> List[Dict[s
         return _parse_csv_content(csv_stream)
 
 
+def _detect_encoding(raw_data: bytes) -> str:
+    """
+    Detect the text encoding of raw CSV bytes.
+    
+    Pure-ASCII payloads (the common case for English keyword lists) skip
+    chardet entirely: a UTF-8 BOM or an ASCII byte scan is enough to decide.
+    """
+    # Handle BOM for UTF-8
+    if raw_data.startswith(b'\xef\xbb\xbf'):
+        return 'utf-8-sig'
+    
+    # Fast path: check the first block before scanning the whole payload
+    if raw_data[:8192].isascii() and raw_data.isascii():
+        return 'utf-8'
+    
+    encoding_result = chardet.detect(raw_data)
+    encoding = encoding_result.get('encoding') or 'utf-8'
+    
+    # Handle BOM for UTF-8
+    if encoding.lower().startswith('utf-8'):
+        encoding = 'utf-8-sig'
+    
+    return encoding
+
+
 def _parse_csv_content(csv_file) -> List[Dict[str, Optional[str]]]:
     """Parse CSV content with auto-detection of delimiter and format."""
-    # Read first few lines to detect format
-    first_lines = []
-    csv_file.seek(0)
-    for i, line in enumerate(csv_file):
-        first_lines.append(line)
-        if i >= 5:  # Read first 6 lines for detection
-            break
-    
+    # Read the content once; detection runs on the first few lines only
     csv_file.seek(0)
+    content = csv_file.read()
+    first_lines = content.split('\n', 6)[:6]  # First 6 lines for detection
     
     # Detect delimiter
-    sample_content = ''.join(first_lines)
+    sample_content = '\n'.join(first_lines)
     sniffer = csv.Sniffer()
     
     try:
@@ -126,13 +148,9 @@ def _parse_csv_content(csv_file) -> List[Dict[str, Optional[str]]]:
         dialect = csv.excel
         dialect.delimiter = ','
     
-    # Parse CSV with detected/default dialect
-    reader = csv.DictReader(csv_file, dialect=dialect)
-    
     # Handle headerless CSV
     if not _has_header(first_lines, dialect.delimiter):
-        csv_file.seek(0)
-        reader = csv.reader(csv_file, dialect=dialect)
+        reader = csv.reader(io.StringIO(content), dialect=dialect)
         rows = list(reader)
         
         if not rows:
@@ -152,6 +170,7 @@ def _parse_csv_content(csv_file) -> List[Dict[str, Optional[str]]]:
         return _process_raw_data(data)
     else:
         # Has header - use DictReader
+        reader = csv.DictReader(io.StringIO(content), dialect=dialect)
         data = []
         for row in reader:
             # Clean up the row data
@@ -172,12 +191,9 @@ def _has_header(first_lines: List[str], delimiter: str) -> bool:
     
     first_row = first_lines[0].strip().split(delimiter)
     
-    # Look for common header patterns
-    header_keywords = ['keyword', 'category', 'source', 'location', 'type', 'term']
-    
+    # Look for common header patterns, stopping at the first matching cell
     for cell in first_row:
-        cell_lower = cell.lower().strip()
-        if any(keyword in cell_lower for keyword in header_keywords):
+        if _HEADER_RE.search(cell):
             return True
     
     # If we have multiple lines, check if first row looks different from second
@@ -220,7 +236,7 @@ def _process_raw_data(data: List[Dict[str, Any]]) -> List[Dict[str, Optional[str
     for row in data:
         keyword = str(row.get(keyword_col, '')).strip() if row.get(keyword_col) else None
         
-        if not keyword or keyword.lower() in ['nan', 'none', '', 'null']:
+        if not keyword or keyword.lower() in _EMPTY_SENTINELS:
             continue
             
         category = None
@@ -228,7 +244,7 @@ def _process_raw_data(data: List[Dict[str, Any]]) -> List[Dict[str, Optional[str
             category_value = row.get(category_col)
             if category_value is not None:
                 category = str(category_value).strip()
-                if category.lower() in ['nan', 'none', '', 'null']:
+                if category.lower() in _EMPTY_SENTINELS:
                     category = None
         
         source_location = None  
@@ -236,7 +252,7 @@ def _process_raw_data(data: List[Dict[str, Any]]) -> List[Dict[str, Optional[str
             source_location_value = row.get(source_location_col)
             if source_location_value is not None:
                 source_location = str(source_location_value).strip()
-                if source_location.lower() in ['nan', 'none', '', 'null']:
+                if source_location.lower() in _EMPTY_SENTINELS:
                     source_location = None
         
         results.append({
@@ -270,17 +286,8 @@ def _normalize_category(category: Optional[str]) -> Optional[str]:
     if not category:
         return 'industry'  # Default category for CSV
         
-    category = (category or '').lower().strip()
-    
-    # Map variations to standard categories
-    if category in ['company', 'companies', 'corp', 'corporation']:
-        return 'company'
-    elif category in ['industry', 'industries', 'sector', 'business']:
-        return 'industry' 
-    elif category in ['regulatory', 'regulation', 'regulator', 'compliance']:
-        return 'regulatory'
-    else:
-        return category
+    category = category.lower().strip()
+    return CATEGORY_MAP.get(category, category)
 
 
 def extract_keywords_from_csv(csv_file: Union[str, io.StringIO, io.BytesIO]) -> Dict[str, Any]:
@@ -308,6 +315,11 @@ def extract_keywords_from_csv(csv_file: Union[str, io.StringIO, io.BytesIO]) ->
         processed_keywords = []
         source_locations = {}
         region_stats = {"global": 0, "include": 0, "exclude": 0}
+        categories_set = set()
+        has_non_industry = False
+        # Files carry only a handful of distinct source locations, so each
+        # parsed region config is shared by every row that uses it
+        region_configs = {}
         
         for i, item in enumerate(raw_keywords):
             try:
@@ -319,12 +331,20 @@ def extract_keywords_from_csv(csv_file: Union[str, io.StringIO, io.BytesIO]) ->
                     continue
                     
                 # Parse source location according to spec
-                region_config = _parse_source_location(source_location)
+                region_config = region_configs.get(source_location)
+                if region_config is None:
+                    region_config = _parse_source_location(source_location)
+                    region_configs[source_location] = region_config
+                
+                category = category or 'industry'
+                categories_set.add(category)
+                if category != 'industry':
+                    has_non_industry = True
                 
                 # Build processed keyword object
                 processed_keyword = {
                     'keyword': keyword,
-                    'category': category or 'industry',
+                    'category': category,
                     'region_mode': region_config['region_mode'],
                     'country': region_config['country']
                 }
@@ -335,21 +355,23 @@ def extract_keywords_from_csv(csv_file: Union[str, io.StringIO, io.BytesIO]) ->
                 # Update stats
                 region_stats[region_config['region_mode'].lower()] += 1
                 
-                # Log per specification
-                logging.info(f"CSV row: {processed_keyword}")
+                # Per-row detail only at DEBUG; formatting is deferred until enabled
+                logging.debug("CSV row: %s", processed_keyword)
                 
             except Exception as e:
                 logging.error(f"Error processing CSV row {i}: {item}, error: {str(e)}")
                 raise e
         
+        logging.info("Processed %d CSV rows", len(processed_keywords))
+        
         return {
             'keywords': processed_keywords,
             'source_locations': source_locations,
             'stats': {
                 'total_keywords': len(processed_keywords),
                 'region_breakdown': region_stats,
-                'has_category_column': any(kw.get('category') != 'industry' for kw in processed_keywords),
-                'unique_categories': list(set(kw.get('category') for kw in processed_keywords if kw.get('category')))
+                'has_category_column': has_non_industry,
+                'unique_categories': list(categories_set)
             },
             'validation': {
                 'valid': True,
@@ -378,7 +400,7 @@ def _parse_source_location(source_location: str) -> Dict[str, Optional[str]]:
     - "X" -> region_mode="INCLUDE", country="X"
     - "!X" -> region_mode="EXCLUDE", country="X"
     """
-    if not source_location or (source_location and source_location.lower() in ['na', 'null', 'none', '']):
+    if not source_location or (source_location and source_location.lower() in _GLOBAL_MARKERS):
         return {'region_mode': 'GLOBAL', 'country': None}
     
     source_location = (source_location or '').strip()
@@ -413,8 +435,12 @@ def create_batches(keywords: List[Dict[str, Any]], batch_size: int = 200) -> Dic
     if batch_size <= 0:
         raise ValueError("Batch size must be positive")
     
+    # Capture the group timestamp once and reuse it for every batch
+    now = datetime.now()
+    now_iso = now.isoformat()
+    
     # Generate unique group ID
-    group_id = f"csv-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{str(uuid.uuid4())[:8]}"
+    group_id = f"csv-{now.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
     
     # Split into batches
     batches = []
@@ -427,7 +453,7 @@ def create_batches(keywords: List[Dict[str, Any]], batch_size: int = 200) -> Dic
             'keywords': batch_keywords,
             'size': len(batch_keywords),
             'status': 'pending',
-            'created_at': datetime.now().isoformat(),
+            'created_at': now_iso,
             'started_at': None,
             'completed_at': None,
             'timing_ms': None,
@@ -439,7 +465,7 @@ def create_batches(keywords: List[Dict[str, Any]], batch_size: int = 200) -> Dic
         'batches': batches,
         'total_batches': len(batches),
         'total_keywords': len(keywords),
-        'created_at': datetime.now().isoformat(),
+        'created_at': now_iso,
         'status': 'created'
     }
 
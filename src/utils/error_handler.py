@@ -1,11 +1,22 @@
 """
 Standardized error handling for the Newstrack automation system.
 """
+import os
+import atexit
+import queue
+import re
+import logging
 import traceback
+from logging.handlers import QueueHandler, QueueListener
 from typing import Dict, Any, Optional
-from flask import current_app, jsonify
+from flask import Response, current_app, jsonify
 from werkzeug.exceptions import HTTPException
 
+try:
+    import orjson
+except ImportError:  # optional speedup, jsonify is used without it
+    orjson = None
+
 
 class NewstrackError(Exception):
     """Base exception for Newstrack automation errors."""
@@ -50,6 +61,14 @@ class LLMError(NewstrackError):
         self.model = model
 
 
+class PromptTooLargeError(LLMError):
+    """Raised when a prompt cannot fit the model's context window."""
+    
+    def __init__(self, message: str, provider: str = None, model: str = None, details: Dict[str, Any] = None):
+        super().__init__(message, provider, model, details)
+        self.error_code = 'PROMPT_TOO_LARGE'
+
+
 class AuditError(NewstrackError):
     """Raised when audit logging fails."""
     
@@ -57,6 +76,33 @@ class AuditError(NewstrackError):
         super().__init__(message, 'AUDIT_ERROR', details)
 
 
+# Keyword separators accepted by validate_keywords
+_KEYWORD_SPLIT_RE = re.compile(r'[\n,]+')
+
+
+# HTTP status codes by error class; subclasses are resolved and cached on first use
+_STATUS_BY_TYPE = {
+    ValidationError: 400,
+    ProcessingError: 422,
+    GuardrailsError: 422,
+    LLMError: 502,
+    PromptTooLargeError: 413,
+    AuditError: 500,
+}
+
+
+def _status_code_for(error_type: type) -> int:
+    """Get the HTTP status code for a NewstrackError class."""
+    status_code = _STATUS_BY_TYPE.get(error_type)
+    if status_code is None:
+        status_code = next(
+            (_STATUS_BY_TYPE[base] for base in error_type.__mro__ if base in _STATUS_BY_TYPE),
+            400
+        )
+        _STATUS_BY_TYPE[error_type] = status_code
+    return status_code
+
+
 def create_error_response(status_code: int, 
                          message: str, 
                          error_code: str = None,
@@ -93,23 +139,23 @@ def create_error_response(status_code: int,
         'request_id': request_id
     })
     
-    return jsonify(error_response), status_code
+    return _json_response(error_response), status_code
+
+
+def _json_response(payload: Dict[str, Any]):
+    """Serialize a payload with orjson when available, otherwise with jsonify."""
+    if orjson is not None:
+        try:
+            return Response(orjson.dumps(payload), mimetype='application/json')
+        except TypeError:
+            # orjson rejects some types (e.g. non-str keys); let Flask's encoder handle them
+            pass
+    return jsonify(payload)
 
 
 def handle_newstrack_error(error: NewstrackError, request_id: str = None) -> tuple:
     """Handle NewstrackError exceptions."""
-    status_code = 400
-    
-    if isinstance(error, ValidationError):
-        status_code = 400
-    elif isinstance(error, ProcessingError):
-        status_code = 422
-    elif isinstance(error, GuardrailsError):
-        status_code = 422
-    elif isinstance(error, LLMError):
-        status_code = 502
-    elif isinstance(error, AuditError):
-        status_code = 500
+    status_code = _status_code_for(type(error))
     
     return create_error_response(
         status_code=status_code,
@@ -132,9 +178,8 @@ def handle_http_exception(error: HTTPException, request_id: str = None) -> tuple
 
 def handle_generic_exception(error: Exception, request_id: str = None) -> tuple:
     """Handle generic exceptions."""
-    # Log the full traceback for debugging
-    current_app.logger.error(f"Unhandled exception: {str(error)}", extra={
-        'traceback': traceback.format_exc(),
+    # Log the full traceback for debugging; exc_info defers formatting to the handler
+    current_app.logger.error(f"Unhandled exception: {str(error)}", exc_info=error, extra={
         'request_id': request_id
     })
     
@@ -175,6 +220,81 @@ def register_error_handlers(app):
         return handle_generic_exception(error, request_id)
 
 
+# Log records waiting for the listener thread; records arriving while it is full are dropped
+_LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops records while the queue is full instead of blocking or erroring."""
+    
+    def __init__(self, queue_):
+        super().__init__(queue_)
+        self.dropped = 0
+    
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _DrainingQueueListener(QueueListener):
+    """
+    QueueListener whose shutdown sentinel waits (briefly) for room in a full queue,
+    and which reports how many records its queue handler dropped once it stops.
+    """
+    
+    def __init__(self, queue_, *handlers, queue_handler: _DroppingQueueHandler, respect_handler_level=False):
+        super().__init__(queue_, *handlers, respect_handler_level=respect_handler_level)
+        self.queue_handler = queue_handler
+    
+    def enqueue_sentinel(self):
+        try:
+            self.queue.put(self._sentinel, timeout=5)
+        except queue.Full:
+            pass  # listener thread is gone; nothing left to drain
+    
+    def stop(self):
+        # Safe to call twice: a manual stop() is followed by the atexit hook
+        if self._thread is None:
+            return
+        super().stop()
+        self._thread = None
+        
+        dropped = self.queue_handler.dropped
+        if dropped:
+            # The thread is gone, so hand the warning straight to the wrapped handlers
+            self.handle(logging.makeLogRecord({
+                'name': __name__,
+                'levelno': logging.WARNING,
+                'levelname': 'WARNING',
+                'msg': f"Log queue was full; dropped {dropped} record(s)",
+            }))
+
+
+def init_queue_logging(app) -> Optional[QueueListener]:
+    """
+    Move the app logger's handlers behind a bounded queue drained by a background
+    thread, so error logging on the request path never blocks on handler I/O.
+    """
+    handlers = [h for h in app.logger.handlers if not isinstance(h, QueueHandler)]
+    if not handlers:
+        return None
+    
+    log_queue = queue.Queue(maxsize=_LOG_QUEUE_SIZE)
+    queue_handler = _DroppingQueueHandler(log_queue)
+    listener = _DrainingQueueListener(log_queue, *handlers, queue_handler=queue_handler,
+                                      respect_handler_level=True)
+    for handler in handlers:
+        app.logger.removeHandler(handler)
+    app.logger.addHandler(queue_handler)
+    
+    listener.start()
+    # Flush any queued records on interpreter shutdown
+    atexit.register(listener.stop)
+    return listener
+
+
 def validate_request_data(data: Dict[str, Any], required_fields: list, optional_fields: list = None) -> None:
     """
     Validate request data against required and optional fields.
@@ -191,10 +311,7 @@ def validate_request_data(data: Dict[str, Any], required_fields: list, optional_
         raise ValidationError("Request data must be a JSON object")
     
     # Check required fields
-    missing_fields = []
-    for field in required_fields:
-        if field not in data or data[field] is None or data[field] == '':
-            missing_fields.append(field)
+    missing_fields = [field for field in required_fields if data.get(field) in (None, '')]
     
     if missing_fields:
         raise ValidationError(
@@ -203,11 +320,8 @@ def validate_request_data(data: Dict[str, Any], required_fields: list, optional_
         )
     
     # Check for unexpected fields
-    allowed_fields = set(required_fields)
-    if optional_fields:
-        allowed_fields.update(optional_fields)
-    
-    unexpected_fields = set(data.keys()) - allowed_fields
+    allowed_fields = frozenset(required_fields).union(optional_fields or ())
+    unexpected_fields = data.keys() - allowed_fields
     if unexpected_fields:
         raise ValidationError(
             f"Unexpected fields: {', '.join(unexpected_fields)}",
@@ -231,27 +345,14 @@ def validate_keywords(keywords: str) -> list:
     if not keywords or not keywords.strip():
         raise ValidationError("Keywords cannot be empty")
     
-    # Split by newlines first, then by commas
-    keyword_list = []
-    for line in keywords.strip().split('\n'):
-        line = line.strip()
-        if line:
-            if ',' in line:
-                # Split by comma and clean each keyword
-                for keyword in line.split(','):
-                    keyword = keyword.strip()
-                    if keyword:
-                        keyword_list.append(keyword)
-            else:
-                keyword_list.append(line)
-    
-    # Remove duplicates while preserving order
-    seen = set()
-    unique_keywords = []
-    for keyword in keyword_list:
-        if keyword.lower() not in seen:
-            seen.add(keyword.lower())
-            unique_keywords.append(keyword)
+    # Split on newlines and commas in one pass, dropping empty tokens
+    tokens = [token for token in (part.strip() for part in _KEYWORD_SPLIT_RE.split(keywords)) if token]
+    
+    # Remove duplicates while preserving order (first spelling wins)
+    seen = {}
+    for token in tokens:
+        seen.setdefault(token.lower(), token)
+    unique_keywords = list(seen.values())
     
     if not unique_keywords:
         raise ValidationError("No valid keywords found")
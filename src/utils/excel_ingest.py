@@ -4,10 +4,61 @@ Supports .xls/.xlsx files with fallback across different Excel libraries.
 """
 import os
 import io
-from typing import List, Dict, Optional, Any, Union
+import importlib.util
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Union, Iterator
 import logging
 
 
+# openpyxl picks lxml up automatically when it is installed (optional, not a requirement);
+# without it read-only parsing uses the slower pure-Python ElementTree parser
+if importlib.util.find_spec('lxml') is None:
+    logging.debug("lxml not installed, openpyxl will use the ElementTree parser")
+
+# Rust-backed reader for both .xls and .xlsx (pandas >= 2.2), used when installed
+_CALAMINE_AVAILABLE = importlib.util.find_spec('python_calamine') is not None
+
+# Cell text (lowercased) treated as an empty value: pandas' default NA strings plus 'none'
+_EMPTY_SENTINELS = frozenset({
+    '', 'nan', 'none', 'na', 'n/a', 'null', '<na>', '#n/a', '#n/a n/a', '#na',
+    '-nan', '1.#ind', '-1.#ind', '1.#qnan', '-1.#qnan'
+})
+
+# Source location text (lowercased) meaning no region restriction
+_GLOBAL_MARKERS = frozenset({'na', 'null', 'none', ''})
+
+# Category variations mapped to their standard names (shared with csv_ingest)
+CATEGORY_MAP = {
+    'company': 'company',
+    'companies': 'company',
+    'corp': 'company',
+    'corporation': 'company',
+    'industry': 'industry',
+    'industries': 'industry',
+    'sector': 'industry',
+    'business': 'industry',
+    'regulatory': 'regulatory',
+    'regulation': 'regulatory',
+    'regulator': 'regulatory',
+    'compliance': 'regulatory',
+}
+
+# Header names for each column role, with their priority (lower wins)
+_COLUMN_ROLES = {
+    'keyword': ('keyword', 0),
+    'keywords': ('keyword', 1),
+    'term': ('keyword', 2),
+    'terms': ('keyword', 3),
+    'category': ('category', 0),
+    'type': ('category', 1),
+    'classification': ('category', 2),
+    'source location': ('source_location', 0),
+    'source_location': ('source_location', 1),
+    'region': ('source_location', 2),
+    'location': ('source_location', 3),
+}
+
+
 def load_keywords(file_path: str) -> List[Dict[str, Optional[str]]]:
     """
     Load keywords from Excel file with source location data.
@@ -28,7 +79,27 @@ def load_keywords(file_path: str) -> List[Dict[str, Optional[str]]]:
     """
     if not os.path.exists(file_path):
         raise FileNotFoundError(f"Excel file not found: {file_path}")
-        
+    
+    # Key on mtime/size so an edited file is re-parsed automatically
+    st = os.stat(file_path)
+    cached = _load_keywords_cached(os.path.abspath(file_path), st.st_mtime_ns, st.st_size)
+    return [dict(row) for row in cached]
+
+
+@lru_cache(maxsize=32)
+def _load_keywords_cached(file_path: str, mtime_ns: int, size: int) -> tuple:
+    """Parse an Excel file once per (path, mtime, size); returns an immutable snapshot."""
+    return tuple(_load_keywords_uncached(file_path))
+
+
+def _load_keywords_uncached(file_path: str) -> List[Dict[str, Optional[str]]]:
+    """Load keywords trying calamine, pandas, openpyxl, then xlrd."""
+    # Rust reader straight into the row pipeline, no DataFrame in between
+    if _CALAMINE_AVAILABLE:
+        rows = _read_with_calamine(file_path)
+        if rows is not None:
+            return _process_rows(next(rows, ()), rows)
+    
     # Try different Excel reading approaches
     try:
         return _load_with_pandas(file_path)
@@ -47,45 +118,61 @@ def load_keywords(file_path: str) -> List[Dict[str, Optional[str]]]:
                 )
 
 
+def _read_with_calamine(file_path: str) -> Optional[Iterator[list]]:
+    """Read the first sheet as value rows with python-calamine, or None if it can't."""
+    from python_calamine import CalamineWorkbook
+    
+    try:
+        return iter(CalamineWorkbook.from_path(file_path).get_sheet_by_index(0).to_python())
+    except Exception as e:
+        logging.debug(f"calamine failed to read {file_path}, falling back: {e}")
+        return None
+
+
 def _load_with_pandas(file_path: str) -> List[Dict[str, Optional[str]]]:
     """Load Excel using pandas (preferred method)."""
+    return _process_dataframe(_read_excel(file_path))
+
+
+def _read_excel(file_path: str, **kwargs):
+    """Read an Excel file into a pandas DataFrame with the matching engine."""
     import pandas as pd
     
-    # Read the Excel file
+    if _CALAMINE_AVAILABLE:
+        try:
+            return pd.read_excel(file_path, engine='calamine', **kwargs)
+        except Exception as e:
+            logging.debug(f"calamine failed to read {file_path}, falling back: {e}")
+    
     if file_path.endswith('.xlsx'):
-        df = pd.read_excel(file_path, engine='openpyxl')
+        return pd.read_excel(file_path, engine='openpyxl', **kwargs)
     else:
-        df = pd.read_excel(file_path, engine='xlrd')
-    
-    return _process_dataframe(df)
+        return pd.read_excel(file_path, engine='xlrd', **kwargs)
 
 
 def _load_with_openpyxl(file_path: str) -> List[Dict[str, Optional[str]]]:
     """Load Excel using openpyxl (xlsx only)."""
-    if not file_path.endswith('.xlsx'):
+    return list(_iter_with_openpyxl(file_path))
+
+
+def _iter_with_openpyxl(file_path: Union[str, io.BytesIO]) -> Iterator[Dict[str, Optional[str]]]:
+    """Stream rows from an xlsx file or file object with openpyxl's read-only reader."""
+    if isinstance(file_path, str) and not file_path.endswith('.xlsx'):
         raise ValueError("openpyxl only supports .xlsx files")
         
     from openpyxl import load_workbook
     
-    workbook = load_workbook(file_path, read_only=True)
-    sheet = workbook.active
-    
-    # Get headers from first row
-    headers = []
-    for cell in sheet[1]:
-        headers.append(cell.value)
-    
-    # Process data rows
-    data = []
-    for row in sheet.iter_rows(min_row=2, values_only=True):
-        row_dict = {}
-        for i, value in enumerate(row):
-            if i < len(headers) and headers[i]:
-                row_dict[headers[i]] = value
-        data.append(row_dict)
-    
-    # Convert to our format
-    return _process_raw_data(data)
+    workbook = load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        
+        # Get headers from first row
+        headers = next(rows, ())
+        
+        # Convert data rows straight to our format
+        yield from _iter_rows(headers, rows)
+    finally:
+        workbook.close()
 
 
 def _load_with_xlrd(file_path: str) -> List[Dict[str, Optional[str]]]:
@@ -94,80 +181,124 @@ def _load_with_xlrd(file_path: str) -> List[Dict[str, Optional[str]]]:
     
     workbook = xlrd.open_workbook(file_path)
     sheet = workbook.sheet_by_index(0)
+    if sheet.nrows == 0:
+        return _process_rows((), ())
     
-    # Get headers from first row
-    headers = []
-    for col in range(sheet.ncols):
-        headers.append(sheet.cell_value(0, col))
-    
-    # Process data rows
-    data = []
-    for row in range(1, sheet.nrows):
-        row_dict = {}
-        for col in range(sheet.ncols):
-            if col < len(headers) and headers[col]:
-                row_dict[headers[col]] = sheet.cell_value(row, col)
-        data.append(row_dict)
-    
-    return _process_raw_data(data)
+    # First row holds the headers; data rows go straight to our format
+    rows = (sheet.row_values(row) for row in range(1, sheet.nrows))
+    return _process_rows(sheet.row_values(0), rows)
 
 
 def _process_dataframe(df) -> List[Dict[str, Optional[str]]]:
     """Process pandas DataFrame into our format."""
-    results = []
+    # Resolve columns by role (case-insensitive matching)
+    roles = _resolve_columns(df.columns)
+    keyword_col = roles['keyword']
+    category_col = roles['category']
+    source_location_col = roles['source_location']
     
-    # Normalize column names (case-insensitive matching)
-    columns = {col.lower().strip(): col for col in df.columns}
+    if not keyword_col:
+        raise ValueError("No keyword column found. Expected columns: Keyword, Category, Source location")
     
-    keyword_col = _find_column(columns, ['keyword', 'keywords', 'term', 'terms'])
-    category_col = _find_column(columns, ['category', 'type', 'classification'])
-    source_location_col = _find_column(columns, ['source location', 'source_location', 'region', 'location'])
+    # Clean whole columns at once, then keep only rows with a keyword
+    keywords = _clean_column(df[keyword_col])
+    mask = keywords.notna()
+    row_count = int(mask.sum())
     
-    if not keyword_col:
+    if category_col:
+        lowered = _clean_column(df[category_col])[mask].str.lower()
+        categories = _to_list(lowered.map(CATEGORY_MAP).fillna(lowered))
+    else:
+        categories = [None] * row_count
+    
+    if source_location_col:
+        source_locations = _to_list(_clean_column(df[source_location_col])[mask])
+    else:
+        source_locations = [None] * row_count
+    
+    return [
+        {'keyword': keyword, 'category': category, 'source_location': source_location}
+        for keyword, category, source_location in zip(_to_list(keywords[mask]), categories, source_locations)
+    ]
+
+
+def _clean_column(series):
+    """Stringify and strip a column, masking NaN and null markers as missing."""
+    values = series.astype('string').str.strip()
+    return values.mask(values.str.lower().isin(_EMPTY_SENTINELS))
+
+
+def _to_list(series) -> list:
+    """Convert a cleaned column to a list with None for missing values."""
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def _process_rows(headers, rows) -> List[Dict[str, Optional[str]]]:
+    """Process positional value rows into our format using header positions."""
+    return list(_iter_rows(headers, rows))
+
+
+def _iter_rows(headers, rows) -> Iterator[Dict[str, Optional[str]]]:
+    """Lazily convert positional value rows into our format."""
+    positions = _resolve_column_positions(headers)
+    keyword_idx = positions['keyword']
+    category_idx = positions['category']
+    source_location_idx = positions['source_location']
+    
+    if keyword_idx is None:
         raise ValueError("No keyword column found. Expected columns: Keyword, Category, Source location")
     
-    for _, row in df.iterrows():
-        keyword = str(row[keyword_col]).strip() if not pd.isna(row[keyword_col]) else None
-        
-        if not keyword or keyword.lower() in ['nan', 'none', '']:
+    for row in rows:
+        keyword = _clean_value(row, keyword_idx)
+        if keyword is None:
             continue
-            
-        category = None
-        if category_col and not pd.isna(row[category_col]):
-            category = str(row[category_col]).strip()
-            if category.lower() in ['nan', 'none', '']:
-                category = None
         
-        source_location = None  
-        if source_location_col and not pd.isna(row[source_location_col]):
-            source_location = str(row[source_location_col]).strip()
-            if source_location.lower() in ['nan', 'none', '']:
-                source_location = None
-        
-        results.append({
+        yield {
             'keyword': keyword,
-            'category': _normalize_category(category),
-            'source_location': source_location
-        })
-    
-    return results
+            'category': _normalize_category(_clean_value(row, category_idx)),
+            'source_location': _clean_value(row, source_location_idx)
+        }
 
 
-def _process_raw_data(data: List[Dict]) -> List[Dict[str, Optional[str]]]:
-    """Process raw data dictionaries into our format."""
-    import pandas as pd
+def _clean_value(row, idx: Optional[int]) -> Optional[str]:
+    """Stringify and strip one cell, returning None for NaN and null markers."""
+    if idx is None or idx >= len(row) or row[idx] is None:
+        return None
+    
+    value = row[idx]
+    # calamine reports every number as float; keep whole numbers as "12", not "12.0"
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
     
-    # Convert to DataFrame for consistent processing
-    df = pd.DataFrame(data)
-    return _process_dataframe(df)
+    value = str(value).strip()
+    return None if value.lower() in _EMPTY_SENTINELS else value
 
 
-def _find_column(columns: Dict[str, str], candidates: List[str]) -> Optional[str]:
-    """Find a column by trying multiple candidate names."""
-    for candidate in candidates:
-        if candidate in columns:
-            return columns[candidate]
-    return None
+def _resolve_columns(columns) -> Dict[str, Optional[str]]:
+    """Find the keyword, category and source location column names."""
+    columns = list(columns)
+    positions = _resolve_column_positions(columns)
+    return {role: columns[idx] if idx is not None else None for role, idx in positions.items()}
+
+
+def _resolve_column_positions(columns) -> Dict[str, Optional[int]]:
+    """Find the keyword, category and source location column indices in one pass."""
+    resolved = {}
+    for idx, col in enumerate(columns):
+        if not col:
+            continue
+        
+        match = _COLUMN_ROLES.get(str(col).lower().strip())
+        if match:
+            role, rank = match
+            # Earlier candidate names win; on a tie the later column wins
+            if role not in resolved or rank <= resolved[role][1]:
+                resolved[role] = (idx, rank)
+    
+    return {
+        role: resolved[role][0] if role in resolved else None
+        for role in ('keyword', 'category', 'source_location')
+    }
 
 
 def _normalize_category(category: Optional[str]) -> Optional[str]:
@@ -178,14 +309,7 @@ def _normalize_category(category: Optional[str]) -> Optional[str]:
     category = category.lower().strip()
     
     # Map variations to standard categories
-    if category in ['company', 'companies', 'corp', 'corporation']:
-        return 'company'
-    elif category in ['industry', 'industries', 'sector', 'business']:
-        return 'industry' 
-    elif category in ['regulatory', 'regulation', 'regulator', 'compliance']:
-        return 'regulatory'
-    else:
-        return category
+    return CATEGORY_MAP.get(category, category)
 
 
 def validate_excel_format(file_path: str) -> Dict[str, Any]:
@@ -206,28 +330,29 @@ def validate_excel_format(file_path: str) -> Dict[str, Any]:
         - sample_rows: list (first 3 rows)
     """
     try:
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Excel file not found: {file_path}")
+        
+        # Memoized, so a following load_keywords on the same file is free
         keywords = load_keywords(file_path)
         
-        # Try to reload with pandas for column analysis
+        # Column analysis only needs the header row
         try:
-            import pandas as pd
-            if file_path.endswith('.xlsx'):
-                df = pd.read_excel(file_path, engine='openpyxl')
-            else:
-                df = pd.read_excel(file_path, engine='xlrd')
-                
-            columns = [col.lower().strip() for col in df.columns]
+            columns = list(_read_excel(file_path, nrows=0).columns)
+            roles = _resolve_columns(columns)
             
             return {
                 'valid': True,
                 'row_count': len(keywords),
-                'columns_found': list(df.columns),
-                'has_keyword_column': any(col in columns for col in ['keyword', 'keywords', 'term', 'terms']),
-                'has_category_column': any(col in columns for col in ['category', 'type', 'classification']),
-                'has_source_location_column': any(col in columns for col in ['source location', 'source_location', 'region', 'location']),
+                'columns_found': columns,
+                'has_keyword_column': roles['keyword'] is not None,
+                'has_category_column': roles['category'] is not None,
+                'has_source_location_column': roles['source_location'] is not None,
                 'sample_rows': keywords[:3]
             }
-        except:
+        except Exception as e:
+            # Rows already loaded, so a failed header read (e.g. no pandas) isn't fatal
+            logging.warning("Excel column read failed: %s", e)
             return {
                 'valid': True,
                 'row_count': len(keywords),
@@ -282,16 +407,27 @@ def extract_keywords_from_excel(excel_file: Union[str, io.BytesIO]) -> Dict[str,
         source_locations = {}
         region_stats = {"global": 0, "include": 0, "exclude": 0}
         
+        # Sheets carry only a handful of distinct source locations, so each
+        # parsed region config is shared by every row that uses it
+        region_configs = {}
+        unique_sectors = set()
+        
         for item in raw_keywords:
-            keyword = item.get('keyword', '').strip()
-            sector = item.get('category', '').strip() or item.get('sector', '').strip()
-            source_location = item.get('source_location', '').strip()
+            # Loaders already strip values and map blanks to None
+            keyword = item.get('keyword')
+            sector = item.get('category') or item.get('sector')
+            source_location = item.get('source_location') or ''
             
             if not keyword:
                 continue
+            if sector:
+                unique_sectors.add(sector)
                 
             # Parse source location according to spec
-            region_config = _parse_source_location(source_location)
+            region_config = region_configs.get(source_location)
+            if region_config is None:
+                region_config = _parse_source_location(source_location)
+                region_configs[source_location] = region_config
             
             # Build processed keyword object
             processed_keyword = {
@@ -308,7 +444,9 @@ def extract_keywords_from_excel(excel_file: Union[str, io.BytesIO]) -> Dict[str,
             region_stats[region_config['region_mode'].lower()] += 1
             
             # Log per specification
-            logging.info(f"Excel row: {processed_keyword}")
+            logging.debug("Excel row: %s", processed_keyword)
+        
+        logging.info("Processed %d Excel rows (%s)", len(processed_keywords), region_stats)
         
         return {
             'keywords': processed_keywords,
@@ -316,8 +454,8 @@ def extract_keywords_from_excel(excel_file: Union[str, io.BytesIO]) -> Dict[str,
             'stats': {
                 'total_keywords': len(processed_keywords),
                 'region_breakdown': region_stats,
-                'has_sector_column': any(kw.get('sector') for kw in processed_keywords),
-                'unique_sectors': list(set(kw.get('sector') for kw in processed_keywords if kw.get('sector')))
+                'has_sector_column': bool(unique_sectors),
+                'unique_sectors': list(unique_sectors)
             },
             'validation': {
                 'valid': True,
@@ -340,14 +478,15 @@ def extract_keywords_from_excel(excel_file: Union[str, io.BytesIO]) -> Dict[str,
 def _load_from_bytesio(excel_file: io.BytesIO) -> List[Dict[str, Optional[str]]]:
     """Load Excel from BytesIO object (for file uploads)."""
     try:
-        import pandas as pd
-        
         # Reset position to beginning
         excel_file.seek(0)
         
-        # Try to read as Excel
-        df = pd.read_excel(excel_file, engine='openpyxl')
-        return _process_dataframe(df)
+        # Stream values straight off the sheet; pandas only if openpyxl is missing
+        try:
+            return list(_iter_with_openpyxl(excel_file))
+        except ImportError:
+            import pandas as pd
+            return _process_dataframe(pd.read_excel(excel_file, engine='openpyxl'))
         
     except Exception as e:
         logging.error(f"Failed to load BytesIO Excel: {str(e)}")
@@ -363,11 +502,10 @@ def _parse_source_location(source_location: str) -> Dict[str, Optional[str]]:
     - "X" -> region_mode="INCLUDE", country="X"
     - "!X" -> region_mode="EXCLUDE", country="X"
     """
-    if not source_location or source_location.lower() in ['na', 'null', 'none', '']:
+    source_location = (source_location or '').strip()
+    if source_location.lower() in _GLOBAL_MARKERS:
         return {'region_mode': 'GLOBAL', 'country': None}
     
-    source_location = source_location.strip()
-    
     if source_location.startswith('!'):
         # Exclude mode: "!South Africa" -> EXCLUDE South Africa
         country = source_location[1:].strip()
@@ -380,23 +518,29 @@ def _parse_source_location(source_location: str) -> Dict[str, Optional[str]]:
 def create_sample_excel(file_path: str = "sample_keywords.xlsx"):
     """Create a sample Excel file for testing."""
     try:
-        import pandas as pd
+        from openpyxl import Workbook
         
-        sample_data = [
-            {"Keyword": "Allianz", "Sector": "Short-term Insurance", "Source location": "South Africa"},
-            {"Keyword": "Short-term Insurance", "Sector": "Short-term Insurance", "Source location": "South Africa"},
-            {"Keyword": "AIG", "Sector": "Short-term Insurance", "Source location": ""},
-            {"Keyword": "1st for Women", "Sector": "Short-term Insurance", "Source location": "South Africa"},
-            {"Keyword": "Prudential Authority", "Sector": "Short-term Insurance", "Source location": "!South Africa"},
-            {"Keyword": "4 Sure Insurance", "Sector": "Short-term Insurance", "Source location": "South Africa"}
+        headers = ["Keyword", "Sector", "Source location"]
+        sample_rows = [
+            ["Allianz", "Short-term Insurance", "South Africa"],
+            ["Short-term Insurance", "Short-term Insurance", "South Africa"],
+            ["AIG", "Short-term Insurance", ""],
+            ["1st for Women", "Short-term Insurance", "South Africa"],
+            ["Prudential Authority", "Short-term Insurance", "!South Africa"],
+            ["4 Sure Insurance", "Short-term Insurance", "South Africa"]
         ]
         
-        df = pd.DataFrame(sample_data)
-        df.to_excel(file_path, index=False)
+        # Write-only mode streams rows to disk instead of holding every cell
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet()
+        sheet.append(headers)
+        for row in sample_rows:
+            sheet.append(row)
+        workbook.save(file_path)
         return file_path
         
     except ImportError:
-        raise ImportError("pandas required to create sample Excel file")
+        raise ImportError("openpyxl required to create sample Excel file")
 
 
 if __name__ == "__main__":
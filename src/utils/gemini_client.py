@@ -3,13 +3,61 @@ Google Gemini client for evidence gathering using google_search_retrieval.
 Provides search functionality through Gemini 1.5 Flash with search tools.
 """
 import os
+import re
 import json
 import time
 import sqlite3
+import threading
 from datetime import datetime, timedelta
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from dateutil.relativedelta import relativedelta
 
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used without it
+    orjson = None
+
+try:
+    import google.generativeai as genai  # type: ignore
+except ImportError:  # Gemini search is skipped without the SDK
+    genai = None
+
+
+# Outermost JSON object in a model reply, and bare URLs for the text fallback
+_JSON_OBJ_RE = re.compile(r'\{.*\}', re.DOTALL)
+_URL_RE = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+')
+
+# Shared cache connection, opened and migrated once per process
+_CACHE_CONN: Optional[sqlite3.Connection] = None
+_CACHE_LOCK = threading.Lock()
+
+# Static cache SQL, so the connection's statement cache reuses the prepared forms
+_SQL_GET = """
+    SELECT results FROM search_cache 
+    WHERE term = ? AND recency_months = ? AND provider = 'google'
+    AND created_at > datetime('now', '-14 days')
+"""
+_SQL_PUT = """
+    INSERT OR REPLACE INTO search_cache 
+    (term, recency_months, provider, results, created_at)
+    VALUES (?, ?, 'google', ?, datetime('now'))
+"""
+
+
+def _dumps_results(results: List[Dict[str, Any]]):
+    """Serialize cached results; orjson bytes when available, else a JSON string."""
+    if orjson is not None:
+        return orjson.dumps(results)
+    return json.dumps(results)
+
+
+def _loads_results(payload) -> List[Dict[str, Any]]:
+    """Deserialize cached results stored as JSON text or bytes."""
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
 
 def get_google_api_key() -> Optional[str]:
     """Get Google API key from environment."""
@@ -21,6 +69,11 @@ def get_gemini_model() -> str:
     return os.getenv("GEMINI_MODEL", "gemini-1.5-flash")
 
 
+# The SDK keeps its API key in process-global state, so it is configured once at import
+if genai is not None and get_google_api_key():
+    genai.configure(api_key=get_google_api_key())
+
+
 def search_with_gemini(term: str, recency_months: int, max_results: int) -> List[Dict[str, Any]]:
     """
     Search for evidence using Gemini 1.5 Flash with google_search_retrieval.
@@ -38,26 +91,67 @@ def search_with_gemini(term: str, recency_months: int, max_results: int) -> List
     if cached_results:
         return cached_results[:max_results]
     
+    evidence = _search_gemini_live(term, recency_months, max_results)
+    if evidence is None:
+        return []
+    
+    # Cache results
+    _cache_results(term, recency_months, evidence)
+    
+    return evidence[:max_results]
+
+
+def _search_gemini_live(term: str, recency_months: int, max_results: int) -> Optional[List[Dict[str, Any]]]:
+    """Run one live Gemini search; returns None when the search could not be made."""
+    if genai is None:
+        print(f"Gemini search error for '{term}': google-generativeai is not installed")
+        return None
+    
     try:
-        import google.generativeai as genai  # type: ignore
-        
-        api_key = get_google_api_key()
-        if not api_key:
-            return []
-        
-        genai.configure(api_key=api_key)
+        model = _create_search_model()
+        if model is None:
+            return None
         
-        # Create model with google_search_retrieval tool
-        model = genai.GenerativeModel(
-            model_name=get_gemini_model(),
-            tools=[{"google_search_retrieval": {}}]
+        # Generate response with timeout (can't use JSON mode with search grounding)
+        response = model.generate_content(
+            _build_search_prompt(term, recency_months, max_results),
+            generation_config=genai.types.GenerationConfig(
+                temperature=0.1
+            )
         )
         
-        # Build search prompt with recency bias
-        cutoff_date = datetime.now() - relativedelta(months=recency_months)
-        cutoff_str = cutoff_date.strftime("%Y-%m-%d")
+        # Parse response
+        return _parse_gemini_response(response.text, term)
         
-        prompt = f"""Search for recent news articles about "{term}" published after {cutoff_str} (last {recency_months} months).
+    except Exception as e:
+        # Log error but don't fail the pipeline
+        print(f"Gemini search error for '{term}': {e}")
+        return None
+
+
+def _create_search_model():
+    """Return the search model for the configured model name, or None without a key."""
+    if not get_google_api_key():
+        return None
+    return _get_search_model(get_gemini_model())
+
+
+@lru_cache(maxsize=4)
+def _get_search_model(model_name: str):
+    """Build a model with google_search_retrieval, once per model name."""
+    # Create model with google_search_retrieval tool
+    return genai.GenerativeModel(
+        model_name=model_name,
+        tools=[{"google_search_retrieval": {}}]
+    )
+
+
+def _build_search_prompt(term: str, recency_months: int, max_results: int) -> str:
+    """Build the search prompt with a recency bias."""
+    cutoff_date = datetime.now() - relativedelta(months=recency_months)
+    cutoff_str = cutoff_date.strftime("%Y-%m-%d")
+    
+    return f"""Search for recent news articles about "{term}" published after {cutoff_str} (last {recency_months} months).
 
 Return exactly {max_results} relevant news articles in strict JSON format with no additional text:
 
@@ -73,35 +167,13 @@ Return exactly {max_results} relevant news articles in strict JSON format with n
 }}
 
 Focus on recent, credible news sources. Each article should be directly relevant to "{term}". Return only the JSON, no other text."""
-        
-        # Generate response with timeout (can't use JSON mode with search grounding)
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                temperature=0.1
-            )
-        )
-        
-        # Parse response
-        evidence = _parse_gemini_response(response.text, term)
-        
-        # Cache results
-        _cache_results(term, recency_months, evidence)
-        
-        return evidence[:max_results]
-        
-    except Exception as e:
-        # Log error but don't fail the pipeline
-        print(f"Gemini search error for '{term}': {e}")
-        return []
 
 
 def _parse_gemini_response(response_text: str, term: str) -> List[Dict[str, Any]]:
     """Parse Gemini response and normalize to evidence schema."""
     try:
         # First try to find JSON in the response text
-        import re
-        json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
+        json_match = _JSON_OBJ_RE.search(response_text)
         if json_match:
             data = json.loads(json_match.group())
             
@@ -133,11 +205,7 @@ def _parse_text_response(response_text: str, term: str) -> List[Dict[str, Any]]:
     evidence = []
     
     # Simple text parsing for fallback - extract URLs, titles, snippets
-    import re
-    
-    # Look for URL patterns
-    url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    urls = re.findall(url_pattern, response_text)
+    urls = _URL_RE.findall(response_text)
     
     # Create evidence from found URLs (basic fallback)
     for i, url in enumerate(urls[:3]):  # Limit to 3 results
@@ -159,44 +227,52 @@ def _get_cache_db_path() -> str:
     return os.path.join(cache_dir, "cache.sqlite")
 
 
-def _init_cache_db():
+def _get_cache_conn() -> sqlite3.Connection:
+    """Return the shared cache connection, creating it and the schema on first use."""
+    global _CACHE_CONN
+    if _CACHE_CONN is None:
+        # Autocommit; writes open their own explicit transaction
+        conn = sqlite3.connect(
+            _get_cache_db_path(),
+            check_same_thread=False,
+            cached_statements=128,
+            isolation_level=None
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        _init_cache_db(conn)
+        _CACHE_CONN = conn
+    return _CACHE_CONN
+
+
+def _init_cache_db(conn: sqlite3.Connection):
     """Initialize cache database with provider column."""
-    db_path = _get_cache_db_path()
-    with sqlite3.connect(db_path) as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS search_cache (
-                term TEXT,
-                recency_months INTEGER,
-                provider TEXT DEFAULT 'google',
-                results TEXT,
-                created_at TIMESTAMP,
-                PRIMARY KEY (term, recency_months, provider)
-            )
-        """)
-        
-        # Add provider column if it doesn't exist (for backward compatibility)
-        try:
-            conn.execute("ALTER TABLE search_cache ADD COLUMN provider TEXT DEFAULT 'google'")
-        except sqlite3.OperationalError:
-            pass  # Column already exists
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_cache (
+            term TEXT,
+            recency_months INTEGER,
+            provider TEXT DEFAULT 'google',
+            results BLOB,
+            created_at TIMESTAMP,
+            PRIMARY KEY (term, recency_months, provider)
+        )
+    """)
+    
+    # Add provider column if it doesn't exist (for backward compatibility)
+    try:
+        conn.execute("ALTER TABLE search_cache ADD COLUMN provider TEXT DEFAULT 'google'")
+    except sqlite3.OperationalError:
+        pass  # Column already exists
 
 
 def _get_cached_results(term: str, recency_months: int) -> Optional[List[Dict[str, Any]]]:
     """Get cached search results if not expired (14-day TTL)."""
     try:
-        _init_cache_db()
-        db_path = _get_cache_db_path()
-        
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.execute("""
-                SELECT results FROM search_cache 
-                WHERE term = ? AND recency_months = ? AND provider = 'google'
-                AND created_at > datetime('now', '-14 days')
-            """, (term, recency_months))
-            
-            row = cursor.fetchone()
-            if row:
-                return json.loads(row[0])
+        with _CACHE_LOCK:
+            row = _get_cache_conn().execute(_SQL_GET, (term, recency_months)).fetchone()
+        if row:
+            return _loads_results(row[0])
                 
     except Exception as e:
         print(f"Cache read error: {e}")
@@ -206,16 +282,24 @@ def _get_cached_results(term: str, recency_months: int) -> Optional[List[Dict[st
 
 def _cache_results(term: str, recency_months: int, results: List[Dict[str, Any]]):
     """Cache search results with 14-day TTL."""
+    _cache_results_many({term: results}, recency_months)
+
+
+def _cache_results_many(results_by_term: Dict[str, List[Dict[str, Any]]], recency_months: int):
+    """Cache results for several terms in a single transaction."""
     try:
-        _init_cache_db()
-        db_path = _get_cache_db_path()
-        
-        with sqlite3.connect(db_path) as conn:
-            conn.execute("""
-                INSERT OR REPLACE INTO search_cache 
-                (term, recency_months, provider, results, created_at)
-                VALUES (?, ?, 'google', ?, datetime('now'))
-            """, (term, recency_months, json.dumps(results)))
+        with _CACHE_LOCK:
+            conn = _get_cache_conn()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(_SQL_PUT, [
+                    (term, recency_months, _dumps_results(results))
+                    for term, results in results_by_term.items()
+                ])
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
             
     except Exception as e:
-        print(f"Cache write error: {e}")
\ No newline at end of file
+        print(f"Cache write error: {e}")
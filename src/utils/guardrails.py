@@ -4,8 +4,10 @@ Handles category isolation, deduplication, and completeness checks.
 """
 import os
 import re
+import sys
 import json
 import unicodedata
+from functools import lru_cache
 from typing import Dict, List, Set, Tuple, Any
 from flask import current_app
 
@@ -13,10 +15,30 @@ from flask import current_app
 # Module-level cache for guard sets
 _guard_cache = None
 
+# Guard keyword -> categories whose guard set contains it, rebuilt with _guard_cache
+_guard_owners: Dict[str, frozenset] = {}
+
+# (path, mtime_ns, size) of each guard file behind _guard_cache, for hot reload
+_guard_signature = None
+
+_GUARD_CATEGORIES = ('industry', 'company', 'regulatory')
+
+# Runs of whitespace collapsed during keyword normalization
+_WS_RE = re.compile(r'\s+')
+
+# Whole-keyword canonical forms, shared by every engine instance
+_CANONICAL_MAPPINGS = {
+    'auto insurance': 'car insurance',
+    'vehicle insurance': 'car insurance',
+    'motor insurance': 'car insurance',
+    'artificial intelligence': 'ai',
+    'machine learning': 'ml',
+}
+
 
 def load_guards(guards_dir: str = None) -> Dict[str, Set[str]]:
     """Load category guard sets with optional caching and hot reload."""
-    global _guard_cache
+    global _guard_cache, _guard_owners, _guard_signature
     
     if guards_dir is None:
         guards_dir = os.getenv("GUARDS_DIR", "guards")
@@ -27,30 +49,52 @@ def load_guards(guards_dir: str = None) -> Dict[str, Set[str]]:
     if not hot_reload and _guard_cache is not None:
         return _guard_cache
     
+    guard_files = [os.path.join(guards_dir, f'{category}.txt') for category in _GUARD_CATEGORIES]
+    
+    # Hot reload only re-parses when a guard file was added, removed or modified
+    signature = tuple(_file_signature(path) for path in guard_files)
+    if _guard_cache is not None and signature == _guard_signature:
+        return _guard_cache
+    
     guards = {}
-    categories = ['industry', 'company', 'regulatory']
     
-    for category in categories:
-        guard_file = os.path.join(guards_dir, f'{category}.txt')
+    for category, guard_file in zip(_GUARD_CATEGORIES, guard_files):
         keywords = set()
         
-        if os.path.exists(guard_file):
-            try:
-                with open(guard_file, 'r', encoding='utf-8') as f:
-                    for line in f:
-                        line = line.strip().lower()  # Normalize: strip, lower
-                        if line and not line.startswith('#'):  # Drop blanks and comments
-                            keywords.add(line)
-            except Exception as e:
-                if current_app:
-                    current_app.logger.warning(f"Failed to load guard file {guard_file}: {e}")
+        try:
+            with open(guard_file, 'r', encoding='utf-8') as f:
+                lines = f.read().split('\n')
+            # Normalize: strip, lower; drop blanks and comments
+            keywords = {sys.intern(line) for line in (raw.strip().lower() for raw in lines)
+                        if line and not line.startswith('#')}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            if current_app:
+                current_app.logger.warning(f"Failed to load guard file {guard_file}: {e}")
         
-        guards[category] = keywords
+        guards[category] = frozenset(keywords)
+    
+    owners = {}
+    for category, keywords in guards.items():
+        for keyword in keywords:
+            owners.setdefault(keyword, set()).add(category)
     
     _guard_cache = guards
+    _guard_owners = {keyword: frozenset(cats) for keyword, cats in owners.items()}
+    _guard_signature = signature
     return guards
 
 
+def _file_signature(path: str):
+    """(path, mtime_ns, size) for an existing file, or (path, None, None) when missing."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (path, None, None)
+    return (path, st.st_mtime_ns, st.st_size)
+
+
 def enforce_isolation(categories: Dict[str, List[str]]) -> Tuple[Dict[str, List[str]], List[str]]:
     """Enforce cross-category isolation by removing leaked terms.
     
@@ -60,37 +104,50 @@ def enforce_isolation(categories: Dict[str, List[str]]) -> Tuple[Dict[str, List[
     Returns:
         Tuple of (cleaned_categories, leaks_blocked_list)
     """
-    guard_sets = load_guards()
+    load_guards()
+    guard_owners = _guard_owners
     cleaned = {k: [] for k in categories.keys()}
     leaks_blocked = []
     
     for category, keywords in categories.items():
-        current_guard_set = guard_sets.get(category, set())
-        
         for keyword in keywords:
-            normalized = keyword.lower().strip()
-            is_leaked = False
-            
-            # Check if this keyword appears in ANY OTHER guard set
-            for other_category, other_guard_set in guard_sets.items():
-                if other_category != category and normalized in other_guard_set:
-                    # This is a leak - keyword belongs in other_category but is in current category
-                    leaks_blocked.append(keyword)
-                    is_leaked = True
-                    break
-            
-            if not is_leaked:
+            if _is_leak(keyword, category, guard_owners):
+                leaks_blocked.append(keyword)
+            else:
                 cleaned[category].append(keyword)
     
     return cleaned, leaks_blocked
 
 
+def _is_leak(keyword: str, category: str, guard_owners: Dict[str, frozenset]) -> bool:
+    """A leak: the keyword appears in ANY OTHER category's guard set."""
+    owners = guard_owners.get(keyword.lower().strip())
+    return bool(owners) and (len(owners) > 1 or category not in owners)
+
+
+@lru_cache(maxsize=4)
+def _company_matcher(company_guards: frozenset) -> Tuple[re.Pattern, str]:
+    """
+    Partial-match helpers for company guards: one alternation regex finds any
+    guard inside a keyword, and a NUL-joined blob finds a keyword inside any
+    guard with a single substring search.
+    
+    Built on first use and shared across engine instances while the guard set is unchanged.
+    """
+    # Longest first so the alternation tries specific names before their prefixes
+    ordered = sorted(company_guards, key=len, reverse=True)
+    pattern = re.compile('|'.join(re.escape(guard) for guard in ordered))
+    return pattern, '\0'.join(ordered)
+
+
 class GuardrailsEngine:
     """Engine for applying guardrails to keyword processing results."""
     
     def __init__(self):
         self.guards_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), 'guards')
         self.canonical_mappings = self._load_canonical_mappings()
+        # Normalized form per raw keyword; the same terms recur across every pass
+        self._norm_cache: Dict[str, str] = {}
         self.category_guards = self._load_category_guards()
         
     def _load_category_guards(self) -> Dict[str, Set[str]]:
@@ -102,48 +159,58 @@ class GuardrailsEngine:
             guard_file = os.path.join(self.guards_dir, f'{category}.txt')
             keywords = set()
             
-            if os.path.exists(guard_file):
-                try:
-                    with open(guard_file, 'r', encoding='utf-8') as f:
-                        for line in f:
-                            line = line.strip()
-                            if line and not line.startswith('#'):
-                                keywords.add(self._normalize_keyword(line))
-                except Exception as e:
-                    current_app.logger.warning(f"Failed to load guard file {guard_file}: {e}")
+            try:
+                with open(guard_file, 'r', encoding='utf-8') as f:
+                    lines = f.read().split('\n')
+                keywords = {self._normalize_keyword(line) for line in (raw.strip() for raw in lines)
+                            if line and not line.startswith('#')}
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                current_app.logger.warning(f"Failed to load guard file {guard_file}: {e}")
             
-            guards[category] = keywords
+            guards[category] = frozenset(keywords)
             
         return guards
     
     def _load_canonical_mappings(self) -> Dict[str, str]:
         """Load canonical keyword mappings."""
         # For now, return a simple mapping. In production, this could be loaded from a file.
-        return {
-            'auto insurance': 'car insurance',
-            'vehicle insurance': 'car insurance',
-            'motor insurance': 'car insurance',
-            'artificial intelligence': 'ai',
-            'machine learning': 'ml',
-        }
+        return _CANONICAL_MAPPINGS
     
     def _normalize_keyword(self, keyword: str) -> str:
         """Normalize a keyword for comparison."""
+        try:
+            return self._norm_cache[keyword]
+        except KeyError:
+            pass
+        
         # Convert to lowercase
         normalized = keyword.lower().strip()
         
-        # Unicode normalization
-        normalized = unicodedata.normalize('NFKD', normalized)
-        
-        # Remove extra whitespace
-        normalized = re.sub(r'\s+', ' ', normalized)
+        # Printable ASCII with single spaces is already NFKD-normal and has no
+        # whitespace runs, so only other text needs the slow path
+        if not (normalized.isascii() and normalized.isprintable() and '  ' not in normalized):
+            # Unicode normalization
+            normalized = unicodedata.normalize('NFKD', normalized)
+            
+            # Remove extra whitespace
+            normalized = _WS_RE.sub(' ', normalized)
         
         # Apply canonical mapping if exists
-        if normalized in self.canonical_mappings:
-            normalized = self.canonical_mappings[normalized]
-            
+        normalized = self.canonical_mappings.get(normalized, normalized)
+        
+        # Interned so set probes against guard and seen sets can match on identity
+        normalized = sys.intern(normalized)
+        self._norm_cache[keyword] = normalized
         return normalized
     
+    def normalize_many(self, keywords: List[str]) -> List[str]:
+        """Normalize a batch of keywords, computing each distinct keyword only once."""
+        normalize = self._normalize_keyword
+        cache = self._norm_cache
+        return [cache[kw] if kw in cache else normalize(kw) for kw in keywords]
+    
     def _simple_singularize(self, word: str) -> str:
         """Simple singularization for deduplication."""
         word = word.lower()
@@ -171,10 +238,10 @@ class GuardrailsEngine:
                 return category
             
             # Check for partial matches for company names
-            if category == 'company':
-                for guard_keyword in guard_keywords:
-                    if guard_keyword in normalized_keyword or normalized_keyword in guard_keyword:
-                        return category
+            if category == 'company' and guard_keywords:
+                pattern, blob = _company_matcher(guard_keywords)
+                if pattern.search(normalized_keyword) or normalized_keyword in blob:
+                    return category
         
         return None
     
@@ -185,33 +252,57 @@ class GuardrailsEngine:
         Returns:
             Tuple of (deduplicated_categories, duplicates_dropped)
         """
+        deduplicated, _, duplicates_dropped, _ = self._filter_categories(categories, isolate=False)
+        return deduplicated, duplicates_dropped
+    
+    def _filter_categories(self, categories: Dict[str, List[str]], isolate: bool):
+        """
+        Single pass over every keyword applying isolation (optional) then deduplication.
+        
+        Returns:
+            Tuple of (kept_categories, leaks_blocked, duplicates_dropped, kept_normalized)
+        """
+        if isolate:
+            load_guards()
+            guard_owners = _guard_owners
+        
         global_seen = set()
-        deduplicated = {cat: [] for cat in categories.keys()}
+        kept = {cat: [] for cat in categories.keys()}
+        kept_normalized = set()
+        leaks_blocked = []
         duplicates_dropped = []
         
+        # Bound once; these run for every keyword in the batch
+        normalize = self._normalize_keyword
+        singularize = self._simple_singularize
+        
         for category, keywords in categories.items():
-            category_seen = set()
-            
+            kept_in_category = kept[category]
             for keyword in keywords:
-                normalized = self._normalize_keyword(keyword)
-                singular = self._simple_singularize(normalized)
+                if isolate and _is_leak(keyword, category, guard_owners):
+                    leaks_blocked.append(keyword)
+                    continue
+                
+                normalized = normalize(keyword)
+                singular = singularize(normalized)
                 
-                # Check for duplicates (exact, normalized, or singular form)
-                if (normalized in global_seen or 
-                    singular in global_seen or 
-                    normalized in category_seen):
+                # Check for duplicates (normalized or singular form); every
+                # per-category entry is also in global_seen, so one set suffices
+                if normalized in global_seen or singular in global_seen:
                     duplicates_dropped.append(keyword)
-                    current_app.logger.info(f"Duplicate dropped: {keyword}")
                     continue
                 
                 # Add to seen sets
                 global_seen.add(normalized)
                 global_seen.add(singular)
-                category_seen.add(normalized)
                 
-                deduplicated[category].append(keyword)
+                kept_in_category.append(keyword)
+                kept_normalized.add(normalized)
         
-        return deduplicated, duplicates_dropped
+        if duplicates_dropped:
+            current_app.logger.info("Duplicates dropped (%d): %s", len(duplicates_dropped), duplicates_dropped)
+        
+        return kept, leaks_blocked, duplicates_dropped, kept_normalized
     
     def apply_completeness_check(self, 
                                 input_keywords: List[str], 
@@ -222,24 +313,21 @@ class GuardrailsEngine:
         Returns:
             Tuple of (is_complete, missing_keywords)
         """
-        # Normalize input keywords
-        input_normalized = {self._normalize_keyword(kw): kw for kw in input_keywords}
-        
-        # Collect all output keywords
-        output_keywords = []
+        output_normalized = set()
         for category_keywords in output_categories.values():
-            output_keywords.extend(category_keywords)
-        
-        # Normalize output keywords
-        output_normalized = {self._normalize_keyword(kw) for kw in output_keywords}
+            output_normalized.update(self.normalize_many(category_keywords))
+        return self._check_completeness(input_keywords, output_normalized)
+    
+    def _check_completeness(self, input_keywords: List[str], output_normalized: Set[str]) -> Tuple[bool, List[str]]:
+        """Completeness check against an already-normalized set of output keywords."""
+        # Normalize input keywords
+        input_normalized = dict(zip(self.normalize_many(input_keywords), input_keywords))
         
         # Find missing keywords
-        missing = []
-        for norm_input, original_input in input_normalized.items():
-            if norm_input not in output_normalized:
-                missing.append(original_input)
+        missing = [original for normalized, original in input_normalized.items()
+                   if normalized not in output_normalized]
         
-        is_complete = len(missing) == 0
+        is_complete = not missing
         
         if not is_complete:
             current_app.logger.warning(f"Completeness check failed. Missing keywords: {missing}")
@@ -255,18 +343,16 @@ class GuardrailsEngine:
         Returns:
             Dictionary with processed categories and guardrail results
         """
-        # Apply category isolation
-        isolated_categories, leaks_blocked = self.apply_category_isolation(categories)
-        
-        # Apply deduplication
-        deduplicated_categories, duplicates_dropped = self.apply_deduplication(isolated_categories)
+        # Isolation and deduplication in one pass; normalized output feeds the completeness check
+        deduplicated_categories, leaks_blocked, duplicates_dropped, output_normalized = \
+            self._filter_categories(categories, isolate=True)
         
         # Apply completeness check
-        is_complete, missing_keywords = self.apply_completeness_check(input_keywords, deduplicated_categories)
+        is_complete, missing_keywords = self._check_completeness(input_keywords, output_normalized)
         
         # Calculate counts
         input_total = len(input_keywords)
-        output_total = sum(len(keywords) for keywords in deduplicated_categories.values())
+        output_total = sum(map(len, deduplicated_categories.values()))
         
         return {
             'categories': deduplicated_categories,
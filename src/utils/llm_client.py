@@ -4,9 +4,182 @@ Supports OpenAI and Claude with configurable model selection.
 """
 import os
 import json
+import atexit
+import re
+import hashlib
+import itertools
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from typing import Dict, Any, List, Optional
 from flask import current_app
-import openai
+from src.utils.circuit_breaker import CircuitBreaker, is_provider_failure
+from src.utils.error_handler import PromptTooLargeError
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used without it
+    orjson = None
+
+try:
+    import tiktoken
+except ImportError:  # optional, token counts fall back to a 4-chars-per-token estimate
+    tiktoken = None
+
+# One keep-alive connection pool shared by every OpenAI client in the process
+_HTTP_CLIENT = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+
+
+def _get_http_client():
+    """Return the shared httpx client, created on first use and closed at exit."""
+    global _HTTP_CLIENT
+    with _HTTP_CLIENT_LOCK:
+        if _HTTP_CLIENT is None:
+            import httpx
+            import openai
+            # DefaultHttpxClient keeps the SDK's timeout and redirect defaults
+            _HTTP_CLIENT = openai.DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+            atexit.register(_HTTP_CLIENT.close)
+        return _HTTP_CLIENT
+
+
+def _dumps(obj) -> str:
+    """Serialize to JSON text with sorted keys, with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS).decode('utf-8')
+    return json.dumps(obj, sort_keys=True)
+
+
+# Completions at or below this temperature are treated as deterministic and cached
+_CACHEABLE_TEMPERATURE = 0.1
+
+
+class LLMCache:
+    """Thread-safe in-memory LRU of completions keyed by a SHA-256 of the request."""
+    
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(provider: str, model: str, messages: List[Dict[str, str]], temperature: float) -> str:
+        """Hash the request fields that determine the response, message content byte for byte."""
+        # Whitespace is kept as sent: prompts join keywords with newlines, so it carries meaning
+        return hashlib.sha256(_dumps(
+            {"provider": provider, "model": model, "messages": messages, "temperature": temperature}
+        ).encode('utf-8')).hexdigest()
+    
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss."""
+        with self._lock:
+            response = self._entries.get(key)
+            if response is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+    
+    def put(self, key: str, response: str):
+        """Store a response, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = response
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def evict_response(self, response: str):
+        """Drop every entry holding this response, e.g. once it turns out to be unusable."""
+        with self._lock:
+            for key in [k for k, v in self._entries.items() if v == response]:
+                del self._entries[key]
+
+
+_RESPONSE_CACHE = LLMCache(int(os.getenv('LLM_CACHE_SIZE', '256')))
+
+
+# Canned test-mode responses, serialized once
+_TEST_CATEGORIZE_RESPONSE = _dumps({
+    "categories": {
+        "industry": ["test-industry-keyword"],
+        "company": ["test-company-keyword"], 
+        "regulatory": ["test-regulatory-keyword"]
+    },
+    "explanations": {
+        "industry": "Test industry terms for validation",
+        "company": "Test company terms for validation",
+        "regulatory": "Test regulatory terms for validation"
+    }
+})
+
+_TEST_EXPAND_RESPONSE = _dumps({
+    "expanded": {
+        "industry": ["test-industry-keyword", "expanded-industry-term"],
+        "company": ["test-company-keyword", "expanded-company-term"],
+        "regulatory": ["test-regulatory-keyword", "expanded-regulatory-term"]
+    },
+    "notes": "Test expansion with predictable additional terms"
+})
+
+_TEST_DROP_RESPONSE = _dumps({
+    "updated": {
+        "industry": ["test-industry-keyword"],
+        "company": ["test-company-keyword"],
+        "regulatory": ["test-regulatory-keyword"]
+    },
+    "removed": [
+        {"term": "expanded-industry-term", "reason": "Test removal for validation"},
+        {"term": "expanded-company-term", "reason": "Another test removal"}
+    ],
+    "justification": "Test justification for removing outdated terms"
+})
+
+
+# Tokens reserved for the reply on every request (the max_tokens sent to providers)
+_MAX_OUTPUT_TOKENS = 4000
+
+# OpenAI context windows for known model families. Each pattern must match the whole model
+# name (base name plus its dated snapshots); models not listed here are not size-checked.
+_DATED = r'(?:-\d{4}-\d{2}-\d{2})?'
+_CONTEXT_WINDOWS = (
+    (re.compile(rf'gpt-4\.1(?:-mini|-nano)?{_DATED}'), 1047576),
+    (re.compile(rf'gpt-4o(?:-mini)?{_DATED}'), 128000),
+    (re.compile(rf'gpt-4-turbo(?:-preview|{_DATED})|gpt-4-(?:1106|0125)-preview'), 128000),
+    (re.compile(r'gpt-3\.5-turbo(?:-0125|-1106)?'), 16385),
+    (re.compile(r'gpt-4(?:-0314|-0613)?'), 8192),
+)
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model_name: str):
+    """Return the tiktoken encoding for a model, defaulting to the newest one."""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding('o200k_base')
+
+
+def _count_prompt_tokens(model_name: str, messages: List[Dict[str, str]]) -> int:
+    """Count prompt tokens with tiktoken, or estimate them without it."""
+    contents = [str(message.get('content', '')) for message in messages]
+    if tiktoken is None:
+        return sum(map(len, contents)) // 4
+    encoding = _get_encoding(model_name)
+    return sum(len(encoding.encode(content)) for content in contents)
+
+
+# Speaker labels used when flattening chat messages into one Gemini prompt
+_ROLE_PREFIX = {'system': 'System: ', 'user': 'User: ', 'assistant': 'Assistant: '}
+
+# Prompt markers that route test mode to the expand or drop response
+_TEST_DISPATCH_RE = re.compile(r'expand|existing categories|drop|outdated|currency expert', re.I)
+_TEST_DROP_MARKERS = frozenset({'drop', 'outdated', 'currency expert'})
 
 
 class LLMClient:
@@ -15,14 +188,30 @@ class LLMClient:
     def __init__(self):
         self.provider = current_app.config.get('LLM_PROVIDER', 'openai')
         self.model_name = current_app.config.get('MODEL_NAME', 'gpt-4.1-mini')
+        # Fail fast during provider outages instead of waiting out every timeout
+        self._breaker = CircuitBreaker(self.provider)
         if self.provider == 'openai':
-            api_key = os.getenv('OPENAI_API_KEY')
-            if not api_key:
+            # Imported here so Gemini/Claude deployments never load the OpenAI SDK
+            import openai
+            
+            # OPENAI_API_KEYS=key1,key2 spreads requests over several keys' rate limits
+            api_keys = [k.strip() for k in os.getenv('OPENAI_API_KEYS', '').split(',') if k.strip()]
+            if not api_keys and os.getenv('OPENAI_API_KEY'):
+                api_keys = [os.getenv('OPENAI_API_KEY')]
+            if not api_keys:
                 raise ValueError("OPENAI_API_KEY environment variable is required when using OpenAI provider")
-            self.client = openai.OpenAI(
-                api_key=api_key,
-                base_url=os.getenv('OPENAI_API_BASE')
-            )
+            self.clients = [
+                openai.OpenAI(
+                    api_key=api_key,
+                    base_url=os.getenv('OPENAI_API_BASE'),
+                    timeout=openai.DEFAULT_TIMEOUT,
+                    max_retries=openai.DEFAULT_MAX_RETRIES,
+                    http_client=_get_http_client()
+                )
+                for api_key in api_keys
+            ]
+            self.client = self.clients[0]
+            self._client_cycle = itertools.cycle(self.clients)
         elif self.provider == 'claude':
             # Claude client setup - placeholder for now
             self.client = None
@@ -34,7 +223,8 @@ class LLMClient:
             self.api_key = os.getenv('GOOGLE_API_KEY')
             if not self.api_key:
                 raise ValueError("GOOGLE_API_KEY environment variable is required when using Google provider")
-            self.client = None  # Gemini client initialized per request
+            self.client = None
+            self._gemini_model = None  # configured on first Gemini call
         else:
             raise ValueError(f"Unsupported LLM provider: {self.provider}")
     
@@ -49,6 +239,49 @@ class LLMClient:
         Returns:
             The generated response content as a string
         """
+        key = self._cache_key(messages, temperature)
+        if key is not None:
+            cached = _RESPONSE_CACHE.get(key)
+            if cached is not None:
+                return cached
+        
+        self._check_prompt_size(messages)
+        response = self._breaker.call(self._dispatch_completion, messages, temperature,
+                                      is_failure=is_provider_failure)
+        if key is not None:
+            _RESPONSE_CACHE.put(key, response)
+        return response
+    
+    def _check_prompt_size(self, messages: List[Dict[str, str]]):
+        """Raise PromptTooLargeError before sending an OpenAI prompt that cannot fit the context window."""
+        if self.provider != 'openai':
+            return
+        window = next((size for pattern, size in _CONTEXT_WINDOWS if pattern.fullmatch(self.model_name)), None)
+        if window is None:
+            return
+        # Byte-level BPE tokens cover at least one UTF-8 byte each, so the byte length
+        # bounds the token count (unlike the character count, e.g. for CJK or emoji)
+        budget = window - _MAX_OUTPUT_TOKENS
+        if sum(len(str(message.get('content', '')).encode('utf-8')) for message in messages) <= budget:
+            return
+        prompt_tokens = _count_prompt_tokens(self.model_name, messages)
+        if prompt_tokens > budget:
+            raise PromptTooLargeError(
+                f"Prompt has about {prompt_tokens} tokens; {self.model_name} accepts {budget} "
+                f"after reserving {_MAX_OUTPUT_TOKENS} for the reply",
+                provider=self.provider,
+                model=self.model_name,
+                details={'prompt_tokens': prompt_tokens, 'context_window': window}
+            )
+    
+    def _cache_key(self, messages: List[Dict[str, str]], temperature: float) -> Optional[str]:
+        """Cache key for a deterministic request, or None when it must not be cached."""
+        if temperature > _CACHEABLE_TEMPERATURE:
+            return None
+        return LLMCache.make_key(self.provider, self.model_name, messages, temperature)
+    
+    def _dispatch_completion(self, messages: List[Dict[str, str]], temperature: float) -> str:
+        """Send one completion request to the configured provider."""
         if False:  # Test mode removed
             return self._generate_test_response(messages)
         elif self.provider == 'openai':
@@ -63,11 +296,11 @@ class LLMClient:
     def _openai_completion(self, messages: List[Dict[str, str]], temperature: float) -> str:
         """Generate completion using OpenAI API."""
         try:
-            response = self.client.chat.completions.create(
+            response = next(self._client_cycle).chat.completions.create(
                 model=self.model_name,
                 messages=messages,
                 temperature=temperature,
-                max_tokens=4000
+                max_tokens=_MAX_OUTPUT_TOKENS
             )
             return response.choices[0].message.content
         except Exception as e:
@@ -85,27 +318,14 @@ class LLMClient:
         try:
             import google.generativeai as genai  # type: ignore
             
-            genai.configure(api_key=self.api_key)
-            model = genai.GenerativeModel(self.model_name)
-            
-            # Convert messages to Gemini format
-            prompt = ""
-            for msg in messages:
-                role = msg.get('role', 'user')
-                content = msg.get('content', '')
-                if role == 'system':
-                    prompt += f"System: {content}\n\n"
-                elif role == 'user':
-                    prompt += f"User: {content}\n\n"
-                elif role == 'assistant':
-                    prompt += f"Assistant: {content}\n\n"
+            model = self._get_gemini_model(genai)
             
             # Generate response
             response = model.generate_content(
-                prompt,
+                self._gemini_prompt(messages),
                 generation_config=genai.types.GenerationConfig(
                     temperature=temperature,
-                    max_output_tokens=4000
+                    max_output_tokens=_MAX_OUTPUT_TOKENS
                 )
             )
             
@@ -115,57 +335,48 @@ class LLMClient:
             current_app.logger.error(f"Google Gemini API error: {str(e)}")
             raise
     
+    def _get_gemini_model(self, genai):
+        """Return this client's Gemini model, configuring the SDK on first use."""
+        if self._gemini_model is None:
+            genai.configure(api_key=self.api_key)
+            self._gemini_model = genai.GenerativeModel(self.model_name)
+        return self._gemini_model
+    
+    @staticmethod
+    def _gemini_prompt(messages: List[Dict[str, str]]) -> str:
+        """Convert chat messages to a single Gemini prompt; unknown roles are skipped."""
+        parts = []
+        for msg in messages:
+            prefix = _ROLE_PREFIX.get(msg.get('role', 'user'))
+            if prefix is not None:
+                parts.append(f"{prefix}{msg.get('content', '')}\n\n")
+        return ''.join(parts)
+    
     def _generate_test_response(self, messages: List[Dict[str, str]]) -> str:
         """Generate predictable test responses based on prompt content."""
-        prompt = messages[0]['content'].lower() if messages else ''
+        prompt = messages[0]['content'] if messages else ''
         
-        if 'expand' in prompt and 'existing categories' in prompt:
-            return self.generate_test_expand_response()
-        elif 'drop' in prompt or 'outdated' in prompt or 'currency expert' in prompt:
-            return self.generate_test_drop_response()
-        else:
-            return self.generate_test_categorize_response()
+        # One case-insensitive scan; stop as soon as the expand markers are both seen
+        found = set()
+        for match in _TEST_DISPATCH_RE.finditer(prompt):
+            found.add(match.group(0).lower())
+            if 'expand' in found and 'existing categories' in found:
+                return _TEST_EXPAND_RESPONSE
+        if found & _TEST_DROP_MARKERS:
+            return _TEST_DROP_RESPONSE
+        return _TEST_CATEGORIZE_RESPONSE
     
     def generate_test_categorize_response(self) -> str:
         """Generate test response for categorization requests."""
-        return json.dumps({
-            "categories": {
-                "industry": ["test-industry-keyword"],
-                "company": ["test-company-keyword"], 
-                "regulatory": ["test-regulatory-keyword"]
-            },
-            "explanations": {
-                "industry": "Test industry terms for validation",
-                "company": "Test company terms for validation",
-                "regulatory": "Test regulatory terms for validation"
-            }
-        })
+        return _TEST_CATEGORIZE_RESPONSE
     
     def generate_test_expand_response(self) -> str:
         """Generate test response for expansion requests."""
-        return json.dumps({
-            "expanded": {
-                "industry": ["test-industry-keyword", "expanded-industry-term"],
-                "company": ["test-company-keyword", "expanded-company-term"],
-                "regulatory": ["test-regulatory-keyword", "expanded-regulatory-term"]
-            },
-            "notes": "Test expansion with predictable additional terms"
-        })
+        return _TEST_EXPAND_RESPONSE
     
     def generate_test_drop_response(self) -> str:
         """Generate test response for drop requests."""
-        return json.dumps({
-            "updated": {
-                "industry": ["test-industry-keyword"],
-                "company": ["test-company-keyword"],
-                "regulatory": ["test-regulatory-keyword"]
-            },
-            "removed": [
-                {"term": "expanded-industry-term", "reason": "Test removal for validation"},
-                {"term": "expanded-company-term", "reason": "Another test removal"}
-            ],
-            "justification": "Test justification for removing outdated terms"
-        })
+        return _TEST_DROP_RESPONSE
     
     def parse_json_response(self, response: str) -> Dict[str, Any]:
         """
@@ -181,21 +392,69 @@ class LLMClient:
             ValueError: If response is not valid JSON
         """
         try:
-            # Clean up response - remove markdown code blocks if present
-            cleaned = response.strip()
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
-            cleaned = cleaned.strip()
+            # Clean up response - remove markdown code fences if present; either may be
+            # missing (e.g. a truncated reply), so each one is stripped on its own
+            cleaned = response.strip().removeprefix('```json').removeprefix('```')
+            cleaned = cleaned.removesuffix('```').strip()
             
+            if orjson is not None:
+                try:
+                    return orjson.loads(cleaned)
+                except orjson.JSONDecodeError:
+                    # orjson is stricter (e.g. NaN, huge ints); let json decide
+                    pass
             return json.loads(cleaned)
         except json.JSONDecodeError as e:
+            # Don't keep serving a truncated or malformed reply; the next identical prompt retries
+            _RESPONSE_CACHE.evict_response(response)
             current_app.logger.error(f"Failed to parse JSON response: {response}")
             raise ValueError(f"Invalid JSON response from LLM: {str(e)}")
 
 
+_PROVIDER_KEY_ENV = {
+    'openai': 'OPENAI_API_KEY',
+    'claude': 'CLAUDE_API_KEY',
+    'google': 'GOOGLE_API_KEY'
+}
+
+
 def get_llm_client() -> LLMClient:
-    """Get a configured LLM client instance."""
-    return LLMClient()
+    """Get the configured LLM client, reused per app while provider, model and credentials stay the same."""
+    app = current_app._get_current_object()
+    provider = app.config.get('LLM_PROVIDER', 'openai')
+    # Include the credentials so a rotated key builds a fresh client
+    key = (
+        provider,
+        app.config.get('MODEL_NAME', 'gpt-4.1-mini'),
+        os.getenv(_PROVIDER_KEY_ENV.get(provider, ''), ''),
+        os.getenv('OPENAI_API_KEYS'),
+        os.getenv('OPENAI_API_BASE')
+    )
+    
+    cached = app.extensions.get('llm_client')
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    
+    client = LLMClient()
+    app.extensions['llm_client'] = (key, client)
+    return client
+
 
+
+def prewarm_connections(app):
+    """Open provider connections in the background so the first request skips the TLS handshake."""
+    def warm():
+        with app.app_context():
+            try:
+                client = get_llm_client()
+                if client.provider == 'openai':
+                    _get_http_client().head(str(client.client.base_url))
+            except Exception as e:
+                app.logger.warning(f"LLM connection prewarm failed: {str(e)}")
+            
+            from src.utils.config import get_search_mode, get_search_provider, get_perplexity_key
+            if get_search_mode() != 'off' and get_search_provider() == 'perplexity' and get_perplexity_key():
+                from src.utils.perplexity_client import prewarm_connection
+                prewarm_connection()
+    
+    threading.Thread(target=warm, name='prewarm-connections', daemon=True).start()
@@ -3,25 +3,112 @@ Perplexity Sonar API client for evidence-based keyword validation.
 """
 import os
 import json
-import httpx
-from typing import List, Dict, Any
+import atexit
+import threading
+import importlib.util
+from typing import List, Dict, Any, Tuple
 from datetime import datetime, timedelta
+from src.utils.circuit_breaker import CircuitBreaker, is_provider_failure
+
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used without it
+    orjson = None
+
+# HTTP/2 multiplexing needs the optional h2 package; fall back to HTTP/1.1 without it
+_HTTP2_AVAILABLE = importlib.util.find_spec('h2') is not None
+
+_BASE_URL = "https://api.perplexity.ai/chat/completions"
+
+# Per-request timeout in seconds for Sonar calls
+_REQUEST_TIMEOUT = float(os.getenv("PERPLEXITY_TIMEOUT", "30"))
+
+# Shared by every PerplexityClient so an outage short-circuits all lookups
+_BREAKER = CircuitBreaker('perplexity')
+
+# Deterministic test-mode evidence: (url, title, snippet, published_date, first_seen_date),
+# with {term} and {slug} filled in per keyword
+_TEST_EVIDENCE_TEMPLATES = (
+    (
+        "https://example.com/news/{slug}-article-1",
+        "Recent developments in {term}",
+        "This article discusses recent trends and developments related to {term} in the industry.",
+        "2025-07-15",
+        "2025-07-16"
+    ),
+    (
+        "https://example.com/analysis/{slug}-analysis",
+        "{term} market analysis",
+        "Comprehensive analysis of {term} market conditions and regulatory updates.",
+        "2025-08-02",
+        "2025-08-03"
+    )
+)
+
+# Callers build a PerplexityClient per lookup, so the keep-alive pool lives at module level
+_HTTP_CLIENT = None
+_HTTP_CLIENT_LOCK = threading.Lock()
+
+
+def _get_http_client() -> 'httpx.Client':
+    """Return the shared httpx client, created on first use and closed at exit."""
+    global _HTTP_CLIENT
+    with _HTTP_CLIENT_LOCK:
+        if _HTTP_CLIENT is None:
+            import httpx
+            _HTTP_CLIENT = httpx.Client(
+                http2=_HTTP2_AVAILABLE,
+                timeout=_REQUEST_TIMEOUT,
+                limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+            )
+            atexit.register(_HTTP_CLIENT.close)
+        return _HTTP_CLIENT
+
+
+def _loads(data):
+    """Decode JSON text or bytes, with orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def prewarm_connection():
+    """Open a keep-alive connection to the Sonar API ahead of the first lookup."""
+    import httpx
+    
+    try:
+        _get_http_client().head(_BASE_URL)
+    except httpx.HTTPError as e:
+        print(f"Perplexity connection prewarm failed: {e}")
 
 
 class PerplexityClient:
     """Client for Perplexity Sonar API to gather evidence for keyword relevance."""
     
-    def __init__(self, api_key: str, mode: str = "fast"):
+    def __init__(self, api_key: str, mode: str = "fast", http_client: 'httpx.Client' = None):
         """
         Initialize Perplexity client.
         
         Args:
             api_key: Perplexity API key
             mode: Search mode - "off", "fast", or "deep"
+            http_client: Client to send requests with; defaults to the shared keep-alive pool
         """
         self.api_key = api_key
         self.mode = mode
-        self.base_url = "https://api.perplexity.ai/chat/completions"
+        self.base_url = _BASE_URL
+        self._client = http_client or _get_http_client()
+    
+    def close(self):
+        """Close a caller-supplied HTTP client; the shared pool stays open."""
+        if self._client is not _HTTP_CLIENT:
+            self._client.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
     
     def search_keyword(self, term: str, max_results: int = 3, recency_months: int = 6) -> List[Dict[str, Any]]:
         """
@@ -52,35 +139,38 @@ class PerplexityClient:
             return []
         
         try:
-            return self._call_perplexity_api(term, max_results, recency_months)
+            return _BREAKER.call(self._call_perplexity_api, term, max_results, recency_months,
+                                 is_failure=is_provider_failure)
         except Exception as e:
             print(f"Perplexity API error for term '{term}': {e}")
             return []
     
     def _get_test_evidence(self, term: str, max_results: int) -> List[Dict[str, Any]]:
         """Return deterministic test evidence for testing mode."""
-        base_evidence = [
+        slug = term.lower().replace(' ', '-')
+        # Only the items that survive the max_results cut are built
+        return [
             {
                 "provider": "perplexity",
-                "url": f"https://example.com/news/{term.lower().replace(' ', '-')}-article-1",
-                "title": f"Recent developments in {term}",
-                "snippet": f"This article discusses recent trends and developments related to {term} in the industry.",
-                "published_date": "2025-07-15",
-                "first_seen_date": "2025-07-16"
-            },
-            {
-                "provider": "perplexity", 
-                "url": f"https://example.com/analysis/{term.lower().replace(' ', '-')}-analysis",
-                "title": f"{term} market analysis",
-                "snippet": f"Comprehensive analysis of {term} market conditions and regulatory updates.",
-                "published_date": "2025-08-02",
-                "first_seen_date": "2025-08-03"
+                "url": url.format(slug=slug),
+                "title": title.format(term=term),
+                "snippet": snippet.format(term=term),
+                "published_date": published_date,
+                "first_seen_date": first_seen_date
             }
+            for url, title, snippet, published_date, first_seen_date in _TEST_EVIDENCE_TEMPLATES[:max_results]
         ]
-        return base_evidence[:max_results]
     
     def _call_perplexity_api(self, term: str, max_results: int, recency_months: int) -> List[Dict[str, Any]]:
         """Make actual API call to Perplexity Sonar."""
+        headers, payload = self._build_request(term, max_results, recency_months)
+        response = self._client.post(self.base_url, headers=headers, json=payload)
+        response.raise_for_status()
+        return self._parse_response(_loads(response.content), term, max_results)
+    
+    def _build_request(self, term: str, max_results: int,
+                       recency_months: int) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Build the headers and JSON payload for a Sonar request."""
         headers = {
             "Authorization": f"Bearer {self.api_key}",
             "Content-Type": "application/json"
@@ -111,33 +201,31 @@ class PerplexityClient:
             "max_tokens": 1000,
             "temperature": 0.1
         }
+        return headers, payload
+    
+    def _parse_response(self, result: Dict[str, Any], term: str, max_results: int) -> List[Dict[str, Any]]:
+        """Convert a Sonar response body into Evidence dicts."""
+        content = result["choices"][0]["message"]["content"]
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(self.base_url, headers=headers, json=payload)
-            response.raise_for_status()
+        # Parse JSON response from Perplexity (orjson's JSONDecodeError subclasses json's)
+        try:
+            articles = _loads(content)
+            if not isinstance(articles, list):
+                articles = articles.get("articles", []) if isinstance(articles, dict) else []
             
-            result = response.json()
-            content = result["choices"][0]["message"]["content"]
+            today = datetime.now().strftime("%Y-%m-%d")
+            return [
+                {
+                    "provider": "perplexity",
+                    "url": article.get("url", ""),
+                    "title": article.get("title", ""),
+                    "snippet": article.get("snippet", "")[:200],  # Limit snippet length
+                    "published_date": article.get("date", article.get("published_date", "")),
+                    "first_seen_date": today
+                }
+                for article in articles[:max_results]
+            ]
             
-            # Parse JSON response from Perplexity
-            try:
-                articles = json.loads(content)
-                if not isinstance(articles, list):
-                    articles = articles.get("articles", []) if isinstance(articles, dict) else []
-                
-                evidence = []
-                for article in articles[:max_results]:
-                    evidence.append({
-                        "provider": "perplexity",
-                        "url": article.get("url", ""),
-                        "title": article.get("title", ""),
-                        "snippet": article.get("snippet", "")[:200],  # Limit snippet length
-                        "published_date": article.get("date", article.get("published_date", "")),
-                        "first_seen_date": datetime.now().strftime("%Y-%m-%d")
-                    })
-                
-                return evidence
-                
-            except json.JSONDecodeError:
-                print(f"Failed to parse Perplexity response for term '{term}'")
-                return []
\ No newline at end of file
+        except json.JSONDecodeError:
+            print(f"Failed to parse Perplexity response for term '{term}'")
+            return []
\ No newline at end of file
@@ -2,11 +2,38 @@
 Evidence ranking and scoring utilities.
 Provides weightings for different factors including region, domain, and relevance.
 """
-import re
+import heapq
+from bisect import bisect_left
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
-from urllib.parse import urlparse
+from urllib.parse import urlsplit
 from datetime import datetime, timedelta
-from src.utils.region import compute_region_weight, check_domain_fitness
+from src.utils.region import compute_region_weight, _check_content_domain_fitness
+
+# Sector terms that earn a title bonus (insurance, underwriting, claims)
+_SECTOR_KEYWORDS = ('insurance', 'underwriting', 'claims', 'insurer', 'reinsurance', 'coverage')
+
+# Known financial/insurance publications
+_QUALITY_DOMAINS = (
+    'bloomberg.com', 'reuters.com', 'ft.com', 'wsj.com',
+    'moneyweb.co.za', 'businesslive.co.za', 'fin24.com',
+    'insurancejournal.com', 'property-casualty360.com',
+    'insurancebusinessmag.com', 'cover.co.za'
+)
+
+# Related financial terms counted towards content relevance
+_FINANCIAL_TERMS = (
+    'financial', 'investment', 'fund', 'portfolio', 'asset',
+    'liability', 'risk', 'premium', 'policy', 'claim',
+    'market', 'regulatory', 'compliance', 'audit'
+)
+
+# Recency bonus by age: up to 30 days, 90 days, 180 days, then older
+_RECENCY_LIMITS = (30, 90, 180)
+_RECENCY_BONUSES = (1.5, 1.0, 0.5, 0.0)
+
+# Matches beyond this many add nothing once the related-terms bonus is capped at 0.5
+_FINANCIAL_TERMS_CAP = 5
 
 
 def score_evidence_item(
@@ -14,7 +41,8 @@ def score_evidence_item(
     keyword: str,
     sector: str = "short-term P&C",
     region_mode: str = "global",
-    region_country: str = "South Africa"
+    region_country: str = "South Africa",
+    inplace: bool = False
 ) -> Dict[str, Any]:
     """
     Score a single evidence item based on multiple factors.
@@ -25,57 +53,59 @@ def score_evidence_item(
         sector: Business sector for domain fitness
         region_mode: Region filtering mode  
         region_country: Target country for region scoring
+        inplace: Add the score fields to evidence itself instead of a copy
         
     Returns:
         Evidence dict with added 'score' and 'score_breakdown' fields
     """
-    score = 0.0
-    breakdown = {}
+    return _score_evidence(evidence, keyword.lower(), sector, region_mode, region_country, datetime.now(), inplace)
+
+
+def _score_evidence(
+    evidence: Dict[str, Any],
+    keyword_lower: str,
+    sector: str,
+    region_mode: str,
+    region_country: str,
+    now: datetime,
+    inplace: bool = False
+) -> Dict[str, Any]:
+    """
+    Score one evidence item; every text check shares one lowercased copy of the title and content.
     
+    `now` is the reference time for recency, taken once per ranking call. Each
+    factor is worked out first and the score is summed from them in one expression.
+    """
     title = evidence.get('title', '')
     snippet = evidence.get('snippet', '')
     url = evidence.get('url', '')
     region = evidence.get('region_guess')
+    title_lower = title.lower()
+    content_lower = f"{title} {snippet}".lower()
     
     # Parse domain for TLD checks
     domain = ''
     try:
-        domain = urlparse(url).netloc.lower()
+        domain = urlsplit(url).netloc.lower()  # cached; same netloc as urlparse
     except:
         pass
     
     # 1. Region weight
     region_weight = compute_region_weight(region_mode, region_country, region, domain)
-    score += region_weight
-    breakdown['region'] = region_weight
     
     # 2. Domain fitness (penalty for wrong business domain)
-    is_wrong_domain, domain_reason = check_domain_fitness(snippet, title, sector)
-    if is_wrong_domain:
-        domain_penalty = -3.0
-        score += domain_penalty
-        breakdown['domain'] = domain_penalty
-        breakdown['domain_reason'] = domain_reason
-    else:
-        breakdown['domain'] = 0.0
+    is_wrong_domain, domain_reason = _check_content_domain_fitness(content_lower, sector)
+    domain_penalty = -3.0 if is_wrong_domain else 0.0
     
     # 3. Title relevance (keyword appears in title)
-    title_bonus = 0.0
-    if keyword.lower() in title.lower():
-        title_bonus = 2.0
-        score += title_bonus
-    breakdown['title_relevance'] = title_bonus
+    title_bonus = 2.0 if keyword_lower in title_lower else 0.0
     
     # 4. Sector keywords in title (insurance, underwriting, claims)
-    sector_keywords = ['insurance', 'underwriting', 'claims', 'insurer', 'reinsurance', 'coverage']
     sector_bonus = 0.0
-    title_lower = title.lower()
-    for sector_kw in sector_keywords:
+    for sector_kw in _SECTOR_KEYWORDS:
         if sector_kw in title_lower:
             sector_bonus = 1.0
             break
-    score += sector_bonus
-    breakdown['sector_relevance'] = sector_bonus
     
     # 5. Recency bonus (more recent = higher score)
     recency_bonus = 0.0
@@ -83,84 +113,87 @@ def score_evidence_item(
     if published_date:
         try:
             if isinstance(published_date, str):
-                pub_date = datetime.fromisoformat(published_date.replace('Z', '+00:00'))
+                pub_date = _parse_published_date(published_date)
             else:
-                pub_date = published_date
+                pub_date = published_date.replace(tzinfo=None)
                 
-            days_ago = (datetime.now() - pub_date.replace(tzinfo=None)).days
-            
-            if days_ago <= 30:
-                recency_bonus = 1.5
-            elif days_ago <= 90:
-                recency_bonus = 1.0
-            elif days_ago <= 180:
-                recency_bonus = 0.5
-            
-            score += recency_bonus
+            days_ago = (now - pub_date).days
+            recency_bonus = _RECENCY_BONUSES[bisect_left(_RECENCY_LIMITS, days_ago)]
         except:
             pass
-    breakdown['recency'] = recency_bonus
     
     # 6. Source quality (known financial/insurance publications)
     source_bonus = 0.0
-    quality_domains = [
-        'bloomberg.com', 'reuters.com', 'ft.com', 'wsj.com',
-        'moneyweb.co.za', 'businesslive.co.za', 'fin24.com',
-        'insurancejournal.com', 'property-casualty360.com',
-        'insurancebusinessmag.com', 'cover.co.za'
-    ]
-    
-    for quality_domain in quality_domains:
+    for quality_domain in _QUALITY_DOMAINS:
         if quality_domain in domain:
             source_bonus = 1.0
             break
-    score += source_bonus
-    breakdown['source_quality'] = source_bonus
     
     # 7. Content relevance (keyword density and context)
-    content_score = _score_content_relevance(keyword, title + ' ' + snippet)
-    score += content_score
-    breakdown['content_relevance'] = content_score
+    content_score = _content_relevance(keyword_lower, content_lower)
     
     # Final score (minimum 0.1 to avoid completely zeroing out)
+    score = (region_weight + domain_penalty + title_bonus + sector_bonus
+             + recency_bonus + source_bonus + content_score)
     final_score = max(0.1, score)
     
-    # Add scoring info to evidence
-    evidence_with_score = evidence.copy()
+    # Breakdown built in one dict display; domain_reason only for wrong-domain items
+    breakdown = {
+        'region': region_weight,
+        'domain': domain_penalty,
+        **({'domain_reason': domain_reason} if is_wrong_domain else {}),
+        'title_relevance': title_bonus,
+        'sector_relevance': sector_bonus,
+        'recency': recency_bonus,
+        'source_quality': source_bonus,
+        'content_relevance': content_score
+    }
+    
+    # Add scoring info to evidence (or to a copy, unless the caller owns the dict)
+    evidence_with_score = evidence if inplace else evidence.copy()
     evidence_with_score['score'] = round(final_score, 2)
     evidence_with_score['score_breakdown'] = breakdown
     
     return evidence_with_score
 
 
+@lru_cache(maxsize=4096)
+def _parse_published_date(value: str) -> datetime:
+    """Parse an ISO published date into a naive datetime; cached since sources repeat dates."""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).replace(tzinfo=None)
+
+
 def _score_content_relevance(keyword: str, content: str) -> float:
     """Score how relevant the content is to the keyword."""
     if not content or not keyword:
         return 0.0
-    
-    content_lower = content.lower()
-    keyword_lower = keyword.lower()
+    return _content_relevance(keyword.lower(), content.lower())
+
+
+def _content_relevance(keyword_lower: str, content_lower: str) -> float:
+    """_score_content_relevance for an already lowercased keyword and content."""
+    if not keyword_lower:
+        return 0.0
     
     score = 0.0
     
     # Exact keyword matches
-    exact_matches = len(re.findall(re.escape(keyword_lower), content_lower))
+    exact_matches = content_lower.count(keyword_lower)  # non-overlapping, like re.findall
     score += exact_matches * 0.5
     
     # Partial matches (for multi-word keywords)
-    if ' ' in keyword:
+    if ' ' in keyword_lower:
         words = keyword_lower.split()
         word_matches = sum(1 for word in words if word in content_lower)
         score += (word_matches / len(words)) * 0.3
     
-    # Related financial terms
-    financial_terms = [
-        'financial', 'investment', 'fund', 'portfolio', 'asset',
-        'liability', 'risk', 'premium', 'policy', 'claim',
-        'market', 'regulatory', 'compliance', 'audit'
-    ]
-    
-    related_matches = sum(1 for term in financial_terms if term in content_lower)
+    # Related financial terms; counting stops at the cap
+    related_matches = 0
+    for term in _FINANCIAL_TERMS:
+        if term in content_lower:
+            related_matches += 1
+            if related_matches == _FINANCIAL_TERMS_CAP:
+                break
     score += min(related_matches * 0.1, 0.5)  # Cap at 0.5
     
     return min(score, 3.0)  # Cap total content score
@@ -172,7 +205,8 @@ def rank_evidence_list(
     sector: str = "short-term P&C", 
     region_mode: str = "global",
     region_country: str = "South Africa",
-    max_results: int = 3
+    max_results: int = 3,
+    inplace: bool = False
 ) -> List[Dict[str, Any]]:
     """
     Rank and filter evidence list by relevance score.
@@ -184,23 +218,21 @@ def rank_evidence_list(
         region_mode: Region filtering mode
         region_country: Target country
         max_results: Maximum number of results to return
+        inplace: Score the caller's evidence dicts directly instead of copies
         
     Returns:
         Ranked and limited evidence list with scores
     """
     # Score each evidence item
-    scored_evidence = []
-    for evidence in evidence_list:
-        scored_item = score_evidence_item(
-            evidence, keyword, sector, region_mode, region_country
-        )
-        scored_evidence.append(scored_item)
-    
-    # Sort by score (highest first)
-    ranked_evidence = sorted(scored_evidence, key=lambda x: x['score'], reverse=True)
-    
-    # Limit to max results
-    return ranked_evidence[:max_results]
+    keyword_lower = keyword.lower()
+    now = datetime.now()
+    scored_evidence = [
+        _score_evidence(evidence, keyword_lower, sector, region_mode, region_country, now, inplace)
+        for evidence in evidence_list
+    ]
+    
+    # Top max_results by score (highest first); same order as a stable reverse sort + slice
+    return heapq.nlargest(max_results, scored_evidence, key=lambda x: x['score'])
 
 
 def get_score_summary(evidence_list: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -221,24 +253,40 @@ def get_score_summary(evidence_list: List[Dict[str, Any]]) -> Dict[str, Any]:
             'breakdown_summary': {}
         }
     
-    scores = [item.get('score', 0) for item in evidence_list]
-    breakdowns = [item.get('score_breakdown', {}) for item in evidence_list]
+    # Breakdown categories are taken from the first item; running [total, count] per category
+    category_totals = {category: [0, 0] for category in evidence_list[0].get('score_breakdown', {})}
     
-    # Aggregate breakdown categories
-    breakdown_summary = {}
-    if breakdowns:
-        for category in breakdowns[0].keys():
-            values = [bd.get(category, 0) for bd in breakdowns if isinstance(bd.get(category), (int, float))]
-            if values:
-                breakdown_summary[category] = {
-                    'avg': round(sum(values) / len(values), 2),
-                    'total': round(sum(values), 2)
-                }
+    # Single pass: running score sum/min/max plus per-category sums
+    score_total = 0
+    score_min = score_max = evidence_list[0].get('score', 0)
+    for item in evidence_list:
+        score = item.get('score', 0)
+        score_total += score
+        if score < score_min:
+            score_min = score
+        if score > score_max:
+            score_max = score
+        
+        breakdown = item.get('score_breakdown', {})
+        for category, totals in category_totals.items():
+            value = breakdown.get(category)
+            if isinstance(value, (int, float)):
+                totals[0] += value
+                totals[1] += 1
+    
+    breakdown_summary = {
+        category: {
+            'avg': round(total / count, 2),
+            'total': round(total, 2)
+        }
+        for category, (total, count) in category_totals.items()
+        if count
+    }
     
     return {
         'total_items': len(evidence_list),
-        'avg_score': round(sum(scores) / len(scores), 2),
-        'score_range': [round(min(scores), 2), round(max(scores), 2)],
+        'avg_score': round(score_total / len(evidence_list), 2),
+        'score_range': [round(score_min, 2), round(score_max, 2)],
         'breakdown_summary': breakdown_summary
     }
 
@@ -285,8 +333,9 @@ def detect_score_anomalies(evidence_list: List[Dict[str, Any]]) -> List[Dict[str
     if len(evidence_list) < 2:
         return anomalies
     
-    scores = [item.get('score', 0) for item in evidence_list]
-    avg_score = sum(scores) / len(scores)
+    # The high-score check needs the mean up front; summing needs no score list
+    avg_score = sum(item.get('score', 0) for item in evidence_list) / len(evidence_list)
+    high_score_cutoff = avg_score + 1
     
     for i, item in enumerate(evidence_list):
         score = item.get('score', 0)
@@ -315,7 +364,7 @@ def detect_score_anomalies(evidence_list: List[Dict[str, Any]]) -> List[Dict[str
         
         # High score but low relevance anomaly
         content_score = breakdown.get('content_relevance', 0)
-        if score > avg_score + 1 and content_score < 0.5:
+        if score > high_score_cutoff and content_score < 0.5:
             anomalies.append({
                 'type': 'high_score_low_relevance',
                 'item_index': i,
@@ -3,8 +3,9 @@ Region inference and scope validation utilities.
 Handles geographic filtering and validation based on Source location rules.
 """
 import re
+from functools import lru_cache
 from typing import Optional, Dict, Set
-from urllib.parse import urlparse
+from urllib.parse import urlsplit
 
 
 # Region mappings based on TLD and domain patterns
@@ -29,6 +30,9 @@ TLD_REGION_MAP = {
     '.com.br': 'Brazil'
 }
 
+# TLD suffix -> (position in TLD_REGION_MAP, region), for the suffixes that name a region
+_TLD_LOOKUP = {tld: (i, region) for i, (tld, region) in enumerate(TLD_REGION_MAP.items()) if region}
+
 # Domain-specific mappings for known hosts
 DOMAIN_REGION_MAP = {
     'moneyweb.co.za': 'South Africa',
@@ -75,7 +79,37 @@ REGION_KEYWORDS = {
     ]
 }
 
+# Sectors (lowercased) where health insurance content is the wrong business domain
+_PC_SECTORS = frozenset({"short-term p&c", "short-term insurance", "property casualty"})
+
+# Common short forms and aliases of region names, keyed lowercase
+_REGION_VARIATIONS = {
+    'za': 'South Africa',
+    'sa': 'South Africa', 
+    'rsa': 'South Africa',
+    'us': 'United States',
+    'usa': 'United States',
+    'america': 'United States',
+    'uk': 'United Kingdom',
+    'britain': 'United Kingdom',
+    'england': 'United Kingdom'
+}
+
+# REGION_KEYWORDS with each keyword's weight (its word count) worked out up front
+_REGION_KEYWORD_WEIGHTS = tuple(
+    (region, tuple((keyword, len(keyword.split())) for keyword in keywords))
+    for region, keywords in REGION_KEYWORDS.items()
+)
+
+# Health insurance terms that indicate wrong domain for P&C sectors
+_HEALTH_TERMS = (
+    'short-term health insurance', 'stldi', 'aca', 'hhs', 'obamacare',
+    'health insurance marketplace', 'medical insurance', 'health coverage',
+    'short-term medical', 'temporary health', 'interim health'
+)
 
+
+@lru_cache(maxsize=16384)
 def infer_region(url: str, snippet: str, title: str) -> Optional[str]:
     """
     Infer the region from URL, snippet, and title.
@@ -92,8 +126,8 @@ def infer_region(url: str, snippet: str, title: str) -> Optional[str]:
         return None
         
     try:
-        parsed = urlparse(url)
-        domain = parsed.netloc.lower()
+        # urlsplit is cached and yields the same netloc as urlparse
+        domain = urlsplit(url).netloc.lower()
         
         # Check domain-specific mappings first
         if domain in DOMAIN_REGION_MAP:
@@ -101,20 +135,17 @@ def infer_region(url: str, snippet: str, title: str) -> Optional[str]:
             return region if region != 'Global' else None
             
         # Check TLD mappings
-        for tld, region in TLD_REGION_MAP.items():
-            if domain.endswith(tld) and region:
-                return region
+        region = _tld_region(domain)
+        if region:
+            return region
                 
         # Check content for region keywords
         content = f"{title} {snippet}".lower()
         region_scores = {}
         
-        for region, keywords in REGION_KEYWORDS.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in content:
-                    # Weight longer keywords higher
-                    score += len(keyword.split())
+        for region, weighted_keywords in _REGION_KEYWORD_WEIGHTS:
+            # Weight longer keywords higher
+            score = sum(weight for keyword, weight in weighted_keywords if keyword in content)
             
             if score > 0:
                 region_scores[region] = score
@@ -131,6 +162,23 @@ def infer_region(url: str, snippet: str, title: str) -> Optional[str]:
     return None
 
 
+def _tld_region(domain: str) -> Optional[str]:
+    """
+    Region of the first TLD_REGION_MAP suffix the domain ends with.
+    
+    Looks up each dotted suffix of the domain instead of testing every map entry,
+    keeping the map's order as the tie-breaker.
+    """
+    best = None
+    dot = domain.find('.')
+    while dot != -1:
+        entry = _TLD_LOOKUP.get(domain[dot:])
+        if entry is not None and (best is None or entry[0] < best[0]):
+            best = entry
+        dot = domain.find('.', dot + 1)
+    return best[1] if best else None
+
+
 def scope_allows(expected_rule: str, actual_region: Optional[str]) -> bool:
     """
     Check if the actual region satisfies the Source location rule.
@@ -198,25 +246,30 @@ def filter_evidence_by_region(
         # No filtering needed for global scope
         return evidence_list, []
         
+    # Parse the rule once (same reading as scope_allows), then partition in one pass
+    exclude = source_location.startswith("!")
+    rule_region = source_location[1:].strip() if exclude else source_location.strip()
+    
     allowed_items = []
     violations = []
     
     for item in evidence_list:
         region = item.get('region_guess')
-        if scope_allows(source_location, region):
-            allowed_items.append(item)
+        if exclude:
+            allowed = region != rule_region
         else:
-            violations.append(item)
+            allowed = region is None or region == rule_region
+        (allowed_items if allowed else violations).append(item)
     
     # If no items match and we should keep fallback, return best few globally
     if not allowed_items and keep_fallback and violations:
         # Keep up to 2 best items as fallback
-        fallback_items = violations[:2]
-        return fallback_items, violations[2:] if len(violations) > 2 else []
+        return violations[:2], violations[2:]
     
     return allowed_items, violations
 
 
+@lru_cache(maxsize=4096)
 def compute_region_weight(
     region_mode: str,
     region_country: str,
@@ -243,9 +296,7 @@ def compute_region_weight(
         weight -= 4.0
         
     # TLD bonus for matching domains
-    if region_country == "South Africa" and (
-        domain.endswith('.za') or domain.endswith('.co.za')
-    ):
+    if region_country == "South Africa" and domain.endswith('.za'):  # covers .co.za
         weight += 2.0
         
     return max(0.1, weight)  # Minimum weight to avoid zero
@@ -263,18 +314,14 @@ def check_domain_fitness(snippet: str, title: str, sector: str = "short-term P&C
     Returns:
         Tuple of (is_wrong_domain, reason)
     """
-    if sector.lower() in ["short-term p&c", "short-term insurance", "property casualty"]:
-        content = f"{title} {snippet}".lower()
-        
-        # Health insurance terms that indicate wrong domain
-        health_terms = [
-            'short-term health insurance', 'stldi', 'aca', 'hhs', 'obamacare',
-            'health insurance marketplace', 'medical insurance', 'health coverage',
-            'short-term medical', 'temporary health', 'interim health'
-        ]
-        
-        for term in health_terms:
-            if term in content:
+    return _check_content_domain_fitness(f"{title} {snippet}".lower(), sector)
+
+
+def _check_content_domain_fitness(content_lower: str, sector: str) -> tuple[bool, str]:
+    """check_domain_fitness for an already lowercased "title snippet" string."""
+    if sector.lower() in _PC_SECTORS:
+        for term in _HEALTH_TERMS:
+            if term in content_lower:
                 return True, f"Evidence discusses health insurance ({term}), not P&C insurance"
                 
     return False, ""
@@ -295,18 +342,20 @@ def normalize_region_name(region: str) -> str:
         
     region = region.strip()
     
-    # Common variations
-    variations = {
-        'za': 'South Africa',
-        'sa': 'South Africa', 
-        'rsa': 'South Africa',
-        'us': 'United States',
-        'usa': 'United States',
-        'america': 'United States',
-        'uk': 'United Kingdom',
-        'britain': 'United Kingdom',
-        'england': 'United Kingdom'
-    }
-    
-    normalized = variations.get(region.lower(), region)
-    return normalized.title() if normalized else region
\ No newline at end of file
+    normalized = _REGION_VARIATIONS.get(region.lower(), region)
+    return normalized.title() if normalized else region
+
+
+def region_cache_stats() -> Dict[str, Dict[str, float]]:
+    """Hit/miss counts for the memoized region lookups, for observability."""
+    stats = {}
+    for func in (infer_region, compute_region_weight):
+        info = func.cache_info()
+        lookups = info.hits + info.misses
+        stats[func.__name__] = {
+            'hits': info.hits,
+            'misses': info.misses,
+            'size': info.currsize,
+            'hit_rate': round(info.hits / lookups, 3) if lookups else 0.0
+        }
+    return stats
@@ -4,23 +4,153 @@ Provides unified interface for evidence gathering across providers.
 """
 import os
 import json
+import logging
 import sqlite3
-from typing import List, Dict, Any, Optional
-from urllib.parse import urlparse
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
 from src.utils.config import (
     get_search_mode, should_bypass_cache, get_cache_ttl_days,
     get_region_mode, get_region_country, get_query_strategy, is_region_filter_enabled
 )
+try:
+    import orjson
+except ImportError:  # optional speedup, stdlib json is used without it
+    orjson = None
+try:
+    import zstandard
+except ImportError:  # optional, large cache payloads fall back to stdlib zlib
+    zstandard = None
+
 from src.utils.region import infer_region, scope_allows, filter_evidence_by_region
 from src.utils.ranking import rank_evidence_list
+from src.utils.config import get_search_provider as get_configured_provider, get_perplexity_key
+
+# Provider modules load once here; a provider whose dependencies are missing is left as None
+try:
+    from src.utils.gemini_client import search_with_gemini
+except ImportError:
+    search_with_gemini = None
+
+try:
+    from src.utils.perplexity_client import PerplexityClient
+except ImportError:
+    PerplexityClient = None
+
+
+# Worker threads for concurrent evidence searches; each search is network-bound
+_SEARCH_MAX_WORKERS = int(os.getenv("SEARCH_MAX_WORKERS", "8"))
+
+# Failures a cache read/write can hit (SQLite, the cache directory, (de)serialization);
+# the search carries on without the cache when one occurs
+_CACHE_ERRORS = (sqlite3.Error, OSError, ValueError, TypeError)
+
+# Source location values that mean "no region rule"
+_BLANK_LOCATIONS = frozenset({'', 'na', 'null', 'none'})
+
+# One cache connection per process, shared across threads under a lock
+_CACHE_CONN: Optional[sqlite3.Connection] = None
+_CACHE_LOCK = threading.Lock()
+
+# In-process memo in front of the enhanced cache table: cache_key -> (serialized evidence,
+# row creation time in epoch seconds). Guarded by _CACHE_LOCK; entries expire with the cache TTL.
+_EVIDENCE_MEMO: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+_EVIDENCE_MEMO_SIZE = int(os.getenv("EVIDENCE_MEMO_SIZE", "1024"))
+
+# Serialized evidence at least this large is stored compressed (zstd, else zlib)
+_EVIDENCE_COMPRESS_MIN = int(os.getenv("EVIDENCE_COMPRESS_MIN", "1024"))
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_ZLIB_MAGIC = b"x"  # zlib header byte; serialized evidence always starts with "["
+
+# zstd (de)compressors aren't safe to share between concurrent threads, so each thread gets its own
+_ZSTD_LOCAL = threading.local()
+
+# Stay well under SQLite's host-parameter limit for IN (...) lookups
+_CACHE_LOOKUP_CHUNK = 500
+
+# Static cache SQL with the TTL bound as a parameter, so the statement cache reuses the prepared forms
+_SQL_GET_ENHANCED = """
+    SELECT evidence_json, CAST(strftime('%s', created_at) AS INTEGER) FROM search_cache_enhanced 
+    WHERE cache_key = ? AND created_at > datetime('now', ?)
+"""
+_SQL_GET_ENHANCED_MANY = """
+    SELECT cache_key, evidence_json, CAST(strftime('%s', created_at) AS INTEGER) FROM search_cache_enhanced 
+    WHERE cache_key IN ({placeholders}) AND created_at > datetime('now', ?)
+"""
+_SQL_PUT_ENHANCED = """
+    INSERT OR REPLACE INTO search_cache_enhanced 
+    (cache_key, evidence_json, created_at)
+    VALUES (?, ?, datetime('now'))
+"""
+
+
+def _dumps_evidence(evidence: List[Dict[str, Any]]):
+    """
+    Serialize cached evidence; orjson bytes when available, else a JSON string.
+    
+    Payloads of _EVIDENCE_COMPRESS_MIN bytes or more are compressed, with zstd
+    when installed and zlib otherwise.
+    """
+    if orjson is not None:
+        payload = orjson.dumps(evidence)
+    else:
+        payload = json.dumps(evidence)
+    if len(payload) < _EVIDENCE_COMPRESS_MIN:
+        return payload
+    
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    if zstandard is not None:
+        return _zstd_contexts()[0].compress(payload)
+    return zlib.compress(payload, 6)
+
+
+def _loads_evidence(payload) -> List[Dict[str, Any]]:
+    """Deserialize cached evidence stored as JSON text or bytes, compressed or not."""
+    if isinstance(payload, bytes):
+        if payload.startswith(_ZSTD_MAGIC):
+            if zstandard is None:
+                raise ValueError("zstd-compressed evidence but zstandard is not installed")
+            try:
+                payload = _zstd_contexts()[1].decompress(payload)
+            except zstandard.ZstdError as e:
+                raise ValueError(f"corrupt zstd evidence payload: {e}")
+        elif payload.startswith(_ZLIB_MAGIC):
+            try:
+                payload = zlib.decompress(payload)
+            except zlib.error as e:
+                raise ValueError(f"corrupt zlib evidence payload: {e}")
+    
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+def _zstd_contexts():
+    """This thread's (compressor, decompressor) pair; zstd level 3."""
+    contexts = getattr(_ZSTD_LOCAL, "contexts", None)
+    if contexts is None:
+        contexts = (zstandard.ZstdCompressor(level=3), zstandard.ZstdDecompressor())
+        _ZSTD_LOCAL.contexts = contexts
+    return contexts
 
 
 def get_search_provider() -> str:
     """Get the configured search provider."""
-    from src.utils.config import get_search_provider as get_configured_provider
     return get_configured_provider().lower()
 
 
+@lru_cache(maxsize=4)
+def _get_perplexity_client(api_key: str, mode: str) -> 'PerplexityClient':
+    """Perplexity client for a key/mode pair, reused across searches."""
+    return PerplexityClient(api_key, mode)
+
+
 def search_for_evidence(
     term: str, 
     recency_months: int = 6, 
@@ -29,7 +159,8 @@ def search_for_evidence(
     sector: str = "short-term P&C",
     source_location: Optional[str] = None,
     region_mode: Optional[str] = None,
-    region_country: Optional[str] = None
+    region_country: Optional[str] = None,
+    cache_writes: Optional[List[Tuple[str, List[Dict[str, Any]]]]] = None
 ) -> List[Dict[str, Any]]:
     """
     Search for evidence using the configured provider with region-aware query construction.
@@ -43,25 +174,28 @@ def search_for_evidence(
         source_location: Source location rule from Excel (blank | "South Africa" | "!South Africa")
         region_mode: Region filtering mode override
         region_country: Target country override
+        cache_writes: If given, the (cache_key, evidence) cache write is appended here for
+            the caller to flush in bulk instead of being written immediately
         
     Returns:
         List of evidence dictionaries with normalized schema:
         [{"provider": str, "url": str, "title": str, "snippet": str, "published_date": str, "region_guess": str}]
     """
-    provider = get_search_provider()
     if search_mode is None:
         search_mode = get_search_mode()
     
+    # Handle off mode before any provider or region setup
+    if search_mode == "off":
+        return []
+    
+    provider = get_search_provider()
+    
     # Set defaults for region parameters
     if region_mode is None:
         region_mode = get_region_mode()
     if region_country is None:
         region_country = get_region_country()
     
-    # Handle off mode
-    if search_mode == "off":
-        return []
-    
     # Check cache first (unless bypassed)
     cache_key = _get_enhanced_cache_key(provider, term, recency_months, region_mode, region_country, source_location)
     if not should_bypass_cache():
@@ -74,16 +208,17 @@ def search_for_evidence(
     effective_region_country = region_country
     
     if source_location is not None:
-        # Parse source_location to override config settings
-        if not source_location or source_location.strip().lower() in ['', 'na', 'null', 'none']:
+        # Parse source_location to override config settings (stripped once for every check)
+        location = source_location.strip()
+        if location.lower() in _BLANK_LOCATIONS:
             effective_region_mode = "global"
             effective_region_country = None
-        elif source_location.strip().startswith('!'):
+        elif location.startswith('!'):
             effective_region_mode = "exclude"
-            effective_region_country = source_location.strip()[1:].strip()
+            effective_region_country = location[1:].strip()
         else:
             effective_region_mode = "include"
-            effective_region_country = source_location.strip()
+            effective_region_country = location
     
     # Build single region-aware query
     query = _build_region_aware_query(term, sector, effective_region_mode, effective_region_country)
@@ -91,49 +226,130 @@ def search_for_evidence(
     # Route to appropriate provider for live search
     all_results = []
     if provider == "google":
-        from src.utils.gemini_client import search_with_gemini
+        if search_with_gemini is None:
+            raise ImportError("Gemini search is unavailable: its client dependencies are not installed")
         query_results = search_with_gemini(query, recency_months, max_results)
         all_results.extend(query_results)
     else:
         # Fallback to existing Perplexity implementation
-        from src.utils.perplexity_client import PerplexityClient
-        from src.utils.config import get_perplexity_key
+        if PerplexityClient is None:
+            raise ImportError("Perplexity search is unavailable: its client dependencies are not installed")
         
         perplexity_key = get_perplexity_key()
         if perplexity_key:
-            client = PerplexityClient(perplexity_key, search_mode)
+            client = _get_perplexity_client(perplexity_key, search_mode)
             query_results = client.search_keyword(query, max_results, recency_months)
             all_results.extend(query_results)
         else:
             all_results = []
     
-    # Deduplicate by URL host
-    result = _deduplicate_by_host(all_results)
-    
-    # Add region inference to each result
-    for item in result:
-        item['region_guess'] = infer_region(
-            item.get('url', ''), 
-            item.get('snippet', ''), 
-            item.get('title', '')
-        )
+    # Deduplicate by URL host and add region inference to each kept result
+    result = _deduplicate_with_regions(all_results)
     
     # Apply region filtering based on source_location or region_mode
     if is_region_filter_enabled():
         result = _apply_region_filtering(result, source_location, region_mode, region_country)
     
-    # Rank evidence using the new scoring system
+    # Rank evidence using the new scoring system; the items were built above, so score them in place
     result = rank_evidence_list(
-        result, term, sector, region_mode, region_country, max_results
+        result, term, sector, region_mode, region_country, max_results, inplace=True
     )
     
     # Cache the result (unless bypassed)
     if not should_bypass_cache() and result:
-        _cache_evidence_enhanced(cache_key, result)
+        if cache_writes is not None:
+            cache_writes.append((cache_key, result))
+        else:
+            _cache_evidence_enhanced(cache_key, result)
     
     return result
 
 
+def search_for_evidence_many(
+    searches: List[Dict[str, Any]],
+    max_workers: int = _SEARCH_MAX_WORKERS
+) -> List[List[Dict[str, Any]]]:
+    """
+    Run several search_for_evidence calls concurrently on a thread pool.
+    
+    Args:
+        searches: search_for_evidence keyword arguments per search, each including 'term'
+        max_workers: Maximum searches in flight at once
+        
+    Returns:
+        Evidence list for each search, in input order. Identical searches run once,
+        and cached searches are answered from one bulk cache read.
+    """
+    unique = {}
+    for search in searches:
+        unique.setdefault(tuple(sorted(search.items())), search)
+    
+    evidence_by_key = {}
+    if not should_bypass_cache():
+        cache_keys = {}
+        for key, search in unique.items():
+            cache_key = _evidence_cache_key(**search)
+            if cache_key is not None:
+                cache_keys[key] = cache_key
+        cached = _get_cached_evidence_many(list(cache_keys.values()))
+        for key, cache_key in cache_keys.items():
+            if cache_key in cached:
+                evidence_by_key[key] = cached[cache_key][:unique[key].get('max_results', 3)]
+    
+    # Fresh results are cached together in one transaction once the searches finish
+    pending = {key: search for key, search in unique.items() if key not in evidence_by_key}
+    cache_writes = []
+    try:
+        if len(pending) <= 1 or max_workers <= 1:
+            evidence_by_key.update({
+                key: search_for_evidence(**search, cache_writes=cache_writes) for key, search in pending.items()
+            })
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(pending))) as executor:
+                futures = {
+                    key: executor.submit(search_for_evidence, **search, cache_writes=cache_writes)
+                    for key, search in pending.items()
+                }
+                evidence_by_key.update({key: future.result() for key, future in futures.items()})
+    finally:
+        _cache_evidence_many(cache_writes)
+    
+    # Copy the list for repeated searches so callers never share one list between entries
+    results = []
+    seen = set()
+    for search in searches:
+        key = tuple(sorted(search.items()))
+        evidence = evidence_by_key[key]
+        results.append(list(evidence) if key in seen else evidence)
+        seen.add(key)
+    return results
+
+
+def _evidence_cache_key(
+    term: str,
+    recency_months: int = 6,
+    max_results: int = 3,
+    search_mode: Optional[str] = None,
+    sector: str = "short-term P&C",
+    source_location: Optional[str] = None,
+    region_mode: Optional[str] = None,
+    region_country: Optional[str] = None
+) -> Optional[str]:
+    """Enhanced cache key search_for_evidence would use for these arguments; None in off mode."""
+    if search_mode is None:
+        search_mode = get_search_mode()
+    if search_mode == "off":
+        return None
+    
+    if region_mode is None:
+        region_mode = get_region_mode()
+    if region_country is None:
+        region_country = get_region_country()
+    return _get_enhanced_cache_key(
+        get_search_provider(), term, recency_months, region_mode, region_country, source_location
+    )
+
+
 def _build_region_aware_query(term: str, sector: str, region_mode: str, region_country: str) -> str:
     """
     Build a single region-aware search query based on the specification.
@@ -152,22 +368,22 @@ def _build_region_aware_query(term: str, sector: str, region_mode: str, region_c
     Returns:
         Single search query string
     """
-    # Base query: sector + keyword
-    base_query = f"{sector} {term}"
-    
-    if region_mode == "global":
-        return base_query
-    elif region_mode == "include":
-        return f"{base_query} {region_country}" if region_country else base_query
-    elif region_mode == "exclude":
-        return f"{base_query} -{region_country}" if region_country else base_query
-    else:
-        # Default to global for unknown modes
-        return base_query
+    # Each mode builds its query in one f-string; no intermediate base string
+    if region_country:
+        if region_mode == "include":
+            return f"{sector} {term} {region_country}"
+        if region_mode == "exclude":
+            return f"{sector} {term} -{region_country}"
+    
+    # Base query: sector + keyword (global, unknown modes, or no country)
+    return f"{sector} {term}"
 
 
-def _deduplicate_by_host(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Deduplicate results by URL host to avoid duplicate sources."""
+def _deduplicate_with_regions(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Deduplicate results by URL host to avoid duplicate sources, setting each kept
+    result's region_guess in the same pass.
+    """
     seen_hosts = set()
     deduplicated = []
     
@@ -177,13 +393,16 @@ def _deduplicate_by_host(results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             continue
             
         try:
-            host = urlparse(url).netloc.lower()
-            if host not in seen_hosts:
-                seen_hosts.add(host)
-                deduplicated.append(result)
-        except:
-            # Include items with unparseable URLs
-            deduplicated.append(result)
+            # Same netloc as urlparse; urlsplit's parse cache is shared with region inference and scoring
+            host = urlsplit(url).netloc.lower()
+            if host in seen_hosts:
+                continue
+            seen_hosts.add(host)
+        except (ValueError, TypeError, AttributeError):
+            pass  # Include items with unparseable URLs
+        
+        result['region_guess'] = infer_region(url, result.get('snippet', ''), result.get('title', ''))
+        deduplicated.append(result)
     
     return deduplicated
 
@@ -238,41 +457,107 @@ def _get_enhanced_cache_key(
 def _get_cached_evidence_enhanced(cache_key: str) -> Optional[List[Dict[str, Any]]]:
     """Get cached evidence using enhanced cache key."""
     try:
-        _ensure_cache_schema()
-        db_path = _get_cache_db_path()
         ttl_days = get_cache_ttl_days()
         
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT evidence_json FROM search_cache_enhanced 
-                WHERE cache_key = ? AND created_at > datetime('now', '-{} days')
-            """.format(ttl_days), (cache_key,))
+        with _CACHE_LOCK:
+            payload = _memo_get(cache_key, ttl_days * 86400)
+            if payload is None:
+                row = _get_cache_conn().execute(_SQL_GET_ENHANCED, (cache_key, f"-{ttl_days} days")).fetchone()
+                if row:
+                    payload = row[0]
+                    _memo_put(cache_key, payload, row[1])
             
-            row = cursor.fetchone()
-            if row:
-                return json.loads(row[0])
-    except Exception:
-        pass
+        if payload is not None:
+            # Parsed per call, so callers never share evidence dicts
+            return _loads_evidence(payload)
+    except _CACHE_ERRORS as e:
+        logging.warning(f"Evidence cache read failed: {e}")
     
     return None
 
 
+def _get_cached_evidence_many(cache_keys: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """Get unexpired cached evidence for several enhanced cache keys with one query per chunk."""
+    cached = {}
+    unique_keys = list(dict.fromkeys(cache_keys))
+    if not unique_keys:
+        return cached
+    
+    try:
+        ttl_days = get_cache_ttl_days()
+        payloads = {}
+        
+        with _CACHE_LOCK:
+            for cache_key in unique_keys:
+                payload = _memo_get(cache_key, ttl_days * 86400)
+                if payload is not None:
+                    payloads[cache_key] = payload
+            missing = [cache_key for cache_key in unique_keys if cache_key not in payloads]
+            
+            conn = _get_cache_conn() if missing else None
+            for i in range(0, len(missing), _CACHE_LOOKUP_CHUNK):
+                chunk = missing[i:i + _CACHE_LOOKUP_CHUNK]
+                sql = _SQL_GET_ENHANCED_MANY.format(placeholders=",".join("?" * len(chunk)))
+                for cache_key, payload, created in conn.execute(sql, (*chunk, f"-{ttl_days} days")):
+                    payloads[cache_key] = payload
+                    _memo_put(cache_key, payload, created)
+            
+        for cache_key, payload in payloads.items():
+            cached[cache_key] = _loads_evidence(payload)
+    except _CACHE_ERRORS as e:
+        logging.warning(f"Evidence cache bulk read failed: {e}")
+    
+    return cached
+
+
 def _cache_evidence_enhanced(cache_key: str, evidence: List[Dict[str, Any]]):
     """Cache evidence using enhanced cache key."""
+    _cache_evidence_many([(cache_key, evidence)])
+
+
+def _cache_evidence_many(entries: List[Tuple[str, List[Dict[str, Any]]]]):
+    """Cache evidence for several enhanced cache keys in a single transaction."""
+    if not entries:
+        return
+    
     try:
-        _ensure_cache_schema()
-        db_path = _get_cache_db_path()
-        
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO search_cache_enhanced 
-                (cache_key, evidence_json, created_at)
-                VALUES (?, ?, datetime('now'))
-            """, (cache_key, json.dumps(evidence)))
-    except Exception:
-        pass
+        rows = [(cache_key, _dumps_evidence(evidence)) for cache_key, evidence in entries]
+        with _CACHE_LOCK:
+            conn = _get_cache_conn()
+            conn.execute("BEGIN")
+            try:
+                conn.executemany(_SQL_PUT_ENHANCED, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            
+            created = time.time()
+            for cache_key, payload in rows:
+                _memo_put(cache_key, payload, created)
+    except _CACHE_ERRORS as e:
+        logging.warning(f"Evidence cache write failed: {e}")
+
+
+def _memo_get(cache_key: str, ttl_seconds: float):
+    """Serialized evidence memoized for cache_key, or None if absent or past the TTL. Call under _CACHE_LOCK."""
+    entry = _EVIDENCE_MEMO.get(cache_key)
+    if entry is None:
+        return None
+    payload, created = entry
+    if time.time() - created >= ttl_seconds:
+        del _EVIDENCE_MEMO[cache_key]
+        return None
+    _EVIDENCE_MEMO.move_to_end(cache_key)
+    return payload
+
+
+def _memo_put(cache_key: str, payload, created: float):
+    """Memoize a cache row's serialized evidence, evicting the least recently used. Call under _CACHE_LOCK."""
+    _EVIDENCE_MEMO[cache_key] = (payload, created)
+    _EVIDENCE_MEMO.move_to_end(cache_key)
+    if len(_EVIDENCE_MEMO) > _EVIDENCE_MEMO_SIZE:
+        _EVIDENCE_MEMO.popitem(last=False)
 
 
 
@@ -283,75 +568,39 @@ def _get_cache_db_path() -> str:
     return "src/database/search_cache.sqlite"
 
 
-def _ensure_cache_schema():
-    """Ensure cache database has correct schema with enhanced cache table."""
-    db_path = _get_cache_db_path()
-    
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        
-        # Create enhanced cache table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS search_cache_enhanced (
-                cache_key TEXT PRIMARY KEY,
-                evidence_json TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Keep old table for backward compatibility but create new enhanced one
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS search_cache (
-                provider TEXT,
-                term TEXT,
-                recency_months INTEGER,
-                test_mode INTEGER,
-                evidence_json TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                PRIMARY KEY (provider, term, recency_months, test_mode)
-            )
-        """)
-        
-        conn.commit()
-
-
-# Legacy cache functions for backward compatibility
-def _get_cached_evidence(provider: str, term: str, recency_months: int, test_mode: bool) -> Optional[List[Dict[str, Any]]]:
-    """Legacy cached evidence getter."""
-    try:
-        _ensure_cache_schema()
-        db_path = _get_cache_db_path()
-        ttl_days = get_cache_ttl_days()
-        
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                SELECT evidence_json FROM search_cache 
-                WHERE provider = ? AND term = ? AND recency_months = ? AND test_mode = ?
-                AND created_at > datetime('now', '-{} days')
-            """.format(ttl_days), (provider, term, recency_months, int(test_mode)))
-            
-            row = cursor.fetchone()
-            if row:
-                return json.loads(row[0])
-    except Exception:
-        pass
-    
-    return None
+def _get_cache_conn() -> sqlite3.Connection:
+    """Return the shared cache connection, creating it and the schema on first use."""
+    global _CACHE_CONN
+    if _CACHE_CONN is None:
+        # Autocommit for reads; writes batch themselves in an explicit BEGIN/COMMIT
+        conn = sqlite3.connect(
+            _get_cache_db_path(),
+            check_same_thread=False,
+            cached_statements=128,
+            isolation_level=None
+        )
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-64000")
+            _ensure_cache_schema(conn)
+        except Exception:
+            # Not published, so the next call retries; don't leak the half-set-up connection
+            conn.close()
+            raise
+        # Published only once the schema exists, so it is checked exactly once
+        _CACHE_CONN = conn
+    return _CACHE_CONN
 
 
-def _cache_evidence(provider: str, term: str, recency_months: int, test_mode: bool, evidence: List[Dict[str, Any]]):
-    """Legacy evidence caching."""
-    try:
-        _ensure_cache_schema()
-        db_path = _get_cache_db_path()
-        
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT OR REPLACE INTO search_cache 
-                (provider, term, recency_months, test_mode, evidence_json, created_at)
-                VALUES (?, ?, ?, ?, ?, datetime('now'))
-            """, (provider, term, recency_months, int(test_mode), json.dumps(evidence)))
-    except Exception:
-        pass
\ No newline at end of file
+def _ensure_cache_schema(conn: sqlite3.Connection):
+    """Ensure cache database has correct schema with enhanced cache table."""
+    # Create enhanced cache table; WITHOUT ROWID clusters rows on the key every lookup uses
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS search_cache_enhanced (
+            cache_key TEXT PRIMARY KEY,
+            evidence_json BLOB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    """)
@@ -0,0 +1,120 @@
+"""
+Tests for the provider circuit breaker state transitions.
+"""
+import unittest
+from unittest import mock
+
+import httpx
+
+from src.utils.circuit_breaker import CircuitBreaker, CircuitOpenError, is_provider_failure
+
+
+def _fail():
+    raise ValueError("provider down")
+
+
+class CircuitBreakerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch('src.utils.circuit_breaker.time.monotonic', lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker('test', failure_threshold=2, recovery_timeout=30.0)
+
+    def _trip(self):
+        for _ in range(2):
+            with self.assertRaises(ValueError):
+                self.breaker.call(_fail)
+
+    def test_closed_passes_calls_through(self):
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        with self.assertRaises(ValueError):
+            self.breaker.call(_fail)
+        self.assertEqual(self.breaker.state, 'closed')
+
+        with self.assertRaises(ValueError):
+            self.breaker.call(_fail)
+        self.assertEqual(self.breaker.state, 'open')
+
+        func = mock.Mock()
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(func)
+        func.assert_not_called()
+
+    def test_non_failure_errors_do_not_trip(self):
+        for _ in range(3):
+            with self.assertRaises(ValueError):
+                self.breaker.call(_fail, is_failure=lambda e: False)
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_half_open_probe_success_closes(self):
+        self._trip()
+        self.clock += 30.0
+        self.assertEqual(self.breaker.state, 'half-open')
+
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_half_open_probe_failure_reopens(self):
+        self._trip()
+        self.clock += 30.0
+        with self.assertRaises(ValueError):
+            self.breaker.call(_fail)
+        self.assertEqual(self.breaker.state, 'open')
+
+    def test_only_one_probe_at_a_time(self):
+        self._trip()
+        self.clock += 30.0
+
+        def probe():
+            with self.assertRaises(CircuitOpenError):
+                self.breaker.call(lambda: 'second')
+            return 'first'
+
+        self.assertEqual(self.breaker.call(probe), 'first')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_interrupted_probe_frees_the_slot(self):
+        self._trip()
+        self.clock += 30.0
+
+        def interrupted():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self.breaker.call(interrupted)
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.assertEqual(self.breaker.call(lambda: 'ok'), 'ok')
+        self.assertEqual(self.breaker.state, 'closed')
+
+
+def _status_error(status: int) -> httpx.HTTPStatusError:
+    request = httpx.Request('POST', 'https://example.com')
+    return httpx.HTTPStatusError('error', request=request, response=httpx.Response(status, request=request))
+
+
+class IsProviderFailureTest(unittest.TestCase):
+
+    def test_server_errors_and_rate_limits_count(self):
+        for status in (429, 500, 503):
+            self.assertTrue(is_provider_failure(_status_error(status)), status)
+
+    def test_client_errors_do_not_count(self):
+        for status in (400, 401, 404, 422):
+            self.assertFalse(is_provider_failure(_status_error(status)), status)
+
+    def test_timeouts_and_connection_errors_count(self):
+        self.assertTrue(is_provider_failure(httpx.ConnectTimeout('timed out')))
+        self.assertTrue(is_provider_failure(httpx.ConnectError('refused')))
+        self.assertTrue(is_provider_failure(TimeoutError()))
+
+    def test_other_errors_do_not_count(self):
+        self.assertFalse(is_provider_failure(ValueError('bad payload')))
+
+
+if __name__ == '__main__':
+    unittest.main()